@@ -1,14 +1,164 @@
-import click, yaml
-from src.main import run_module
+import click, os, time
+from src.config import load_settings
+
+# Commands import the pipeline (pandas, pyarrow, ...) when they run, so
+# `--help` and quick checks start in milliseconds; see src/import_budget.py.
 
 @click.group()
 def cli(): pass
 
 @cli.command()
-@click.option('--module', default='irb')
-def run(module):
-    cfg = yaml.safe_load(open('./config/settings.yaml'))
-    run_module(module, cfg)
+@click.option('--module', multiple=True, default=['irb'], help='Module to run; repeat to run several concurrently.')
+@click.option('--jobs', type=int, default=None, help='Worker processes (default: settings.max_parallel_jobs).')
+@click.option('--force', is_flag=True, help='Reprocess files even if the change cache says they are done.')
+@click.option('--profile', type=click.Choice(['cpu', 'memory']), is_flag=False, flag_value='cpu', default=None,
+              help='Profile the run with cProfile (cpu, the default) or tracemalloc (memory); runs with one job '
+                   'so all work happens in this process. Reports go to logs/profile/.')
+def run(module, jobs, force, profile):
+    from src.scheduler import run_modules
+    from src.instrumentation import profiled
+    from src.pipeline import stats_db
+    cfg = load_settings()
+    if profile:
+        with profiled(profile, os.path.join(os.path.dirname(stats_db(cfg)), 'profile')) as path:
+            report = run_modules(list(module), cfg, 1, force)
+        click.echo(f"Profile written to {path}")
+    else:
+        report = run_modules(list(module), cfg, jobs, force)
+    _echo_report(report)
+
+def _echo_report(report):
+    from src.scheduler import raise_for_failures
+    click.echo(f"Processed {len(report['processed'])}, skipped {len(report['skipped'])}, "
+               f"failed {len(report['failed'])}")
+    for s in report['skipped']:
+        click.echo(f"  skipped {s['source']}: {s['reason']}")
+    for r in report['processed']:
+        m = r.get('merge')
+        if m and m.get('skipped'):
+            click.echo(f"  not merged {os.path.basename(r['source'])}: {m['skipped']}")
+        elif m:
+            click.echo(f"  merged {os.path.basename(r['source'])}: {m['inserted']} inserted, {m['updated']} updated, "
+                       f"{m['deleted']} deleted, {m['unchanged']} unchanged")
+    try:
+        raise_for_failures(report)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+@cli.command()
+@click.option('--module', multiple=True, default=['irb', 'grants'], help='Module to process; repeat for several.')
+@click.option('--jobs', type=int, default=None, help='Worker processes (default: settings.max_parallel_jobs).')
+@click.option('--connections', type=int, default=None, help='SFTP connections (default: sftp.max_connections).')
+@click.option('--download-only', is_flag=True, help='Fetch into data/incoming/ without processing.')
+@click.option('--force', is_flag=True, help='Re-download and reprocess regardless of ingest state and change cache.')
+def ingest(module, jobs, connections, download_only, force):
+    """Fetch new files from the SFTP feed, processing each one as soon as it lands."""
+    from src.scheduler import run_files
+    from src.sftp_ingest import fetch
+    cfg = load_settings()
+    stats = {}
+    files = fetch(cfg, stats, connections, force)
+    if download_only:
+        for path in files:
+            click.echo(f"  fetched {path}")
+        report = None
+    else:
+        report = run_files(files, list(module), cfg, jobs, force)
+    click.echo(f"SFTP: listed {stats['listed']}, fetched {stats['fetched']}, skipped {stats['skipped']}, "
+               f"unchanged {stats['unchanged']}, failed {stats['failed']}")
+    for err in stats['errors']:
+        click.echo(f"  {err}")
+    if report:
+        _echo_report(report)
+    if stats['failed']:
+        raise click.ClickException(f"{stats['failed']} transfer(s) failed")
+
+@cli.command()
+@click.option('--module', multiple=True, default=['irb', 'grants'], help='Module to process; repeat for several.')
+@click.option('--jobs', type=int, default=None, help='Worker processes (default: settings.max_parallel_jobs).')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many micro-batches (default: run until signalled).')
+def watch(module, jobs, max_batches):
+    """Process files as they land in data/incoming/, in micro-batches, until SIGINT/SIGTERM."""
+    import logging
+    from src.watcher import watch as watch_incoming
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    totals = watch_incoming(list(module), load_settings(), jobs, max_batches)
+    click.echo(f"Batches {totals['batches']}: processed {totals['processed']}, skipped {totals['skipped']}, "
+               f"failed {totals['failed']}")
+
+@cli.command()
+@click.option('--since', default='7d', show_default=True, help="Window start: '7d', '4w' or a date (YYYY-MM-DD).")
+@click.option('--until', default=None, help='Window end (YYYY-MM-DD, default today).')
+@click.option('--module', multiple=True, help="Per-file stats for a module instead of whole runs; 'all' for every module.")
+@click.option('--backfill', is_flag=True, help='Rebuild the rollups from the raw run history first.')
+@click.option('--json', 'as_json', is_flag=True, help='Print JSON.')
+def stats(since, until, module, backfill, as_json):
+    """Run counts, success rate, p50/p95 runtime and rows processed from the rollup tables."""
+    import datetime, json
+    from src import rollups
+    db = load_settings()['paths'].get('stats_db', './logs/etl_stats.db')
+    if not os.path.exists(db):
+        raise click.ClickException(f"{db} does not exist yet")
+    if backfill:
+        click.echo(f"Rebuilt {rollups.backfill(db)} rollup rows", err=as_json)
+    conn = rollups.connect(db, readonly=False)  # applies pending migrations, which backfill once
+    start = rollups.parse_since(since)
+    end = datetime.date.fromisoformat(until) if until else None
+    if not module:
+        names = ['run']
+    elif 'all' in module:
+        names = [s for s in rollups.scopes(conn) if s != 'run']
+    else:
+        names = list(module)
+    results = [rollups.summary(conn, start, end, name) for name in names]
+    if as_json:
+        click.echo(json.dumps(results, indent=2))
+        return
+    for r in results:
+        label = 'runs' if r['scope'] == 'run' else f"{r['scope']} files"
+        click.echo(f"{label} {r['since']}..{r['until']}: {r['runs']} ({r['failures']} failed, "
+                   f"success rate {_or_na(r['success_rate'], '%')}), avg {_or_na(r['avg_sec'], 's')}, "
+                   f"p50 {_or_na(r['p50_sec'], 's')}, p95 {_or_na(r['p95_sec'], 's')}, max {_or_na(r['max_sec'], 's')}"
+                   + (f", {r['rows']:,} rows" if r['scope'] != 'run' else ''))
+
+def _or_na(value, unit):
+    return 'n/a' if value is None else f'{value}{unit}'
+
+@cli.command()
+@click.option('--zone', multiple=True, help='Zone to purge (raw, staging, archive); default all.')
+@click.option('--dry-run', is_flag=True, help='Report what would be removed without deleting anything.')
+def purge(zone, dry_run):
+    from src.retention_cleanup import apply_retention
+    cfg = load_settings()
+    for name, stats in apply_retention(cfg, dry_run, zone).items():
+        verb = 'would remove' if dry_run else 'removed'
+        click.echo(f"{name}: scanned {stats['scanned']}, {verb} {stats['files']} files "
+                   f"({stats['bytes'] / 1024 / 1024:.1f} MB) and {stats['dirs']} directories, {stats['errors']} errors")
+        for p in stats['sample']:
+            click.echo(f"  {p}")
+
+@cli.command()
+@click.option('--module', multiple=True, default=['irb', 'grants'], help='Module to check; repeat for several.')
+@click.option('--sample', type=int, default=1000, help='Rows to check per file (0: header only).')
+@click.argument('files', nargs=-1, type=click.Path(exists=True))
+def validate(module, sample, files):
+    """Pre-flight schema check of incoming files (default: data/incoming/) without processing them."""
+    from src.scheduler import discover
+    from src.validate_schema import load_module
+    tasks = [(m, f) for m in module for f in files if m.upper() in os.path.basename(f).upper()] if files \
+        else discover(list(module))
+    failed = 0
+    for m, f in tasks:
+        _, schema = load_module(m)
+        t0 = time.perf_counter()
+        try:
+            schema.sample(f, sample) if sample else schema.check_header_file(f)
+            verdict = 'ok'
+        except ValueError as e:
+            failed, verdict = failed + 1, f'FAILED: {e}'
+        click.echo(f"{m}: {f}: {verdict} ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    if failed:
+        raise click.ClickException(f"{failed} of {len(tasks)} file(s) failed validation")
 
 if __name__ == '__main__':
     cli()
@@ -1,139 +1,315 @@
-from flask import Flask, render_template_string, send_file
-import pandas as pd, json, os, datetime, io
+from flask import Flask, Response, request, jsonify, stream_with_context, send_file
+import sqlite3, os, datetime, threading, csv, io, json
+from src import rollups
+from src.metadata_utils import latest_manifest
 
 app = Flask(__name__)
 
 # -------- CONFIG --------
-MANIFEST_PATH = './data/metadata/manifest.json'
+MANIFEST_PATH = './data/metadata/manifest.db'
+RUNTIME_DB = './logs/etl_stats.db'
 RUNTIME_CSV = './logs/etl_runtime_stats.csv'
 
-# -------- ROUTES --------
-@app.route('/')
-def dashboard():
-    manifest_data = []
-    runtime_df = None
+# -------- DATA LAYER --------
+# Both databases are read through per-thread, read-only SQLite connections
+# with indexed queries. The rendered page is cached and rebuilt only when the
+# watermark (mtime and size of each database and its WAL file) moves, so a
+# room full of auto-refreshing viewers costs a few stat() calls per hit.
+
+_local = threading.local()
+_page_cache = {'watermark': None, 'html': None}
+_page_lock = threading.Lock()
 
-    # Load manifest
-    if os.path.exists(MANIFEST_PATH):
-        with open(MANIFEST_PATH, 'r') as f:
+def _conn(path):
+    conns = _local.__dict__.setdefault('conns', {})
+    if path not in conns:
+        if not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        conns[path] = conn
+    return conns[path]
+
+def _query(path, sql, args=()):
+    conn = _conn(path)
+    if conn is None:
+        return []
+    try:
+        return [dict(r) for r in conn.execute(sql, args)]
+    except sqlite3.OperationalError:  # table not created yet
+        return []
+
+def _watermark():
+    marks = []
+    for path in (MANIFEST_PATH, RUNTIME_DB):
+        for p in (path, f'{path}-wal'):
             try:
-                manifest_data = json.load(f)
-            except json.JSONDecodeError:
-                manifest_data = []
-    manifest_data = manifest_data[-10:] if manifest_data else []
-
-    # Load runtime data
-    if os.path.exists(RUNTIME_CSV):
-        runtime_df = pd.read_csv(RUNTIME_CSV)
-        runtime_df = runtime_df.tail(10)  # last 10 runs
-
-    html = """
-    <!doctype html>
-    <html>
-    <head>
-        <title>BU Research Data Lake Dashboard</title>
-        <meta http-equiv="refresh" content="120">
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <style>
-            body { font-family: Arial; margin: 40px; }
-            table { border-collapse: collapse; width: 80%; margin-bottom: 40px; }
-            th, td { padding: 8px 12px; border: 1px solid #ccc; text-align: left; }
-            th { background-color: #f5f5f5; }
-            .success { color: green; font-weight: bold; }
-            .failure { color: red; font-weight: bold; }
-            .download-btn {
-                background-color: #007bff;
-                border: none;
-                color: white;
-                padding: 8px 16px;
-                text-align: center;
-                text-decoration: none;
-                font-size: 14px;
-                border-radius: 5px;
-                cursor: pointer;
-            }
-            .download-btn:hover { background-color: #0056b3; }
-        </style>
-    </head>
-    <body>
-        <h1>📊 BU Research Data Lake Dashboard</h1>
-        <h3>Recent ETL Manifest Entries</h3>
-        <table>
-            <tr><th>Filename</th><th>Hash</th><th>Timestamp</th></tr>
-            {% for m in manifest_data %}
-            <tr>
-                <td>{{ m.filename }}</td>
-                <td>{{ m.hash }}</td>
-                <td>{{ m.timestamp }}</td>
-            </tr>
-            {% endfor %}
-        </table>
-
-        {% if runtime_df is not none %}
-        <h3>Recent Runtime Trends (last 10 runs)</h3>
-        <canvas id="runtimeChart" width="800" height="300"></canvas>
-        <script>
-        const ctx = document.getElementById('runtimeChart').getContext('2d');
-        const chart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: {{ runtime_df.date.tolist()|safe }},
-                datasets: [{
-                    label: 'Runtime (minutes)',
-                    data: {{ runtime_df.runtime_min.tolist()|safe }},
-                    borderColor: 'rgb(75, 192, 192)',
-                    backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                    tension: 0.3,
-                    fill: true
-                }]
-            },
-            options: {
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        title: { display: true, text: 'Minutes' }
-                    }
+                st = os.stat(p)
+                marks.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                marks.append(None)
+    return tuple(marks)
+
+def recent_runs(n=10):
+    rows = _query(RUNTIME_DB, 'SELECT date, start_time, end_time, runtime_min, status FROM etl_runtime '
+                              'ORDER BY id DESC LIMIT ?', (n,))
+    return rows[::-1]
+
+STAGE_ORDER = ['read', 'validate', 'clean', 'write', 'stream', 'profile', 'promote', 'record']
+
+def stage_breakdown(days=30):
+    """Average per-file seconds per (module, stage) over the last `days` days."""
+    since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+    return _query(RUNTIME_DB, 'SELECT module, stage, COUNT(*) AS files, ROUND(AVG(wall_sec), 4) AS avg_wall_sec, '
+                              'ROUND(AVG(cpu_sec), 4) AS avg_cpu_sec, MAX(peak_rss_mb) AS peak_rss_mb '
+                              'FROM etl_stage_timing WHERE date >= ? GROUP BY module, stage', (since,))
+
+def stage_chart(rows):
+    """Chart.js data for a stacked bar per module, one dataset per stage."""
+    modules = sorted({r['module'] for r in rows})
+    present = {r['stage'] for r in rows}
+    stages = [s for s in STAGE_ORDER if s in present] + sorted(present - set(STAGE_ORDER))
+    wall = {(r['module'], r['stage']): r['avg_wall_sec'] for r in rows}
+    return {'labels': modules,
+            'datasets': [{'label': s, 'data': [wall.get((m, s), 0) for m in modules]} for s in stages]}
+
+# -------- TEMPLATE (compiled once) --------
+HTML = """
+<!doctype html>
+<html>
+<head>
+    <title>BU Research Data Lake Dashboard</title>
+    <meta http-equiv="refresh" content="120">
+    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <style>
+        body { font-family: Arial; margin: 40px; }
+        table { border-collapse: collapse; width: 80%; margin-bottom: 40px; }
+        th, td { padding: 8px 12px; border: 1px solid #ccc; text-align: left; }
+        th { background-color: #f5f5f5; }
+        .success { color: green; font-weight: bold; }
+        .failure { color: red; font-weight: bold; }
+        .download-btn {
+            background-color: #007bff;
+            border: none;
+            color: white;
+            padding: 8px 16px;
+            text-align: center;
+            text-decoration: none;
+            font-size: 14px;
+            border-radius: 5px;
+            cursor: pointer;
+        }
+        .download-btn:hover { background-color: #0056b3; }
+    </style>
+</head>
+<body>
+    <h1>📊 BU Research Data Lake Dashboard</h1>
+    <h3>Recent ETL Manifest Entries</h3>
+    <table>
+        <tr><th>Filename</th><th>Hash</th><th>Timestamp</th></tr>
+        {% for m in manifest_data %}
+        <tr>
+            <td>{{ m.filename }}</td>
+            <td>{{ m.hash }}</td>
+            <td>{{ m.timestamp }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+
+    {% if runs %}
+    <h3>Recent Runtime Trends (last 10 runs)</h3>
+    <canvas id="runtimeChart" width="800" height="300"></canvas>
+    <script>
+    const ctx = document.getElementById('runtimeChart').getContext('2d');
+    const chart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: {{ runs|map(attribute='date')|list|tojson }},
+            datasets: [{
+                label: 'Runtime (minutes)',
+                data: {{ runs|map(attribute='runtime_min')|list|tojson }},
+                borderColor: 'rgb(75, 192, 192)',
+                backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                tension: 0.3,
+                fill: true
+            }]
+        },
+        options: {
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    title: { display: true, text: 'Minutes' }
                 }
             }
-        });
-        </script>
-
-        <h3>Run History (Last 10 Days)</h3>
-        <table>
-            <tr><th>Date</th><th>Runtime (min)</th><th>Status</th></tr>
-            {% for i, row in runtime_df.iterrows() %}
-            <tr>
-                <td>{{ row.date }}</td>
-                <td>{{ "%.2f"|format(row.runtime_min) }}</td>
-                <td class="{{ row.status }}">{{ row.status }}</td>
-            </tr>
-            {% endfor %}
-        </table>
-
-        <form action="/download" method="get">
-            <button type="submit" class="download-btn">⬇️ Download Full CSV</button>
-        </form>
-        {% else %}
-        <p>No runtime data found yet. Run the ETL at least once.</p>
-        {% endif %}
-    </body>
-    </html>
-    """
-    return render_template_string(html, manifest_data=manifest_data, runtime_df=runtime_df)
+        }
+    });
+    </script>
+
+    <h3>Run History (Last 10 Days)</h3>
+    <table>
+        <tr><th>Date</th><th>Runtime (min)</th><th>Status</th></tr>
+        {% for row in runs %}
+        <tr>
+            <td>{{ row.date }}</td>
+            <td>{{ "%.2f"|format(row.runtime_min) }}</td>
+            <td class="{{ row.status }}">{{ row.status }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+
+    <form action="/download" method="get">
+        <button type="submit" class="download-btn">⬇️ Download Full CSV</button>
+    </form>
+    {% else %}
+    <p>No runtime data found yet. Run the ETL at least once.</p>
+    {% endif %}
+
+    {% if stages.labels %}
+    <h3>Stage Breakdown (avg seconds per file, last 30 days)</h3>
+    <canvas id="stageChart" width="800" height="300"></canvas>
+    <script>
+    new Chart(document.getElementById('stageChart').getContext('2d'), {
+        type: 'bar',
+        data: {{ stages|tojson }},
+        options: {
+            scales: {
+                x: { stacked: true },
+                y: { stacked: true, beginAtZero: true, title: { display: true, text: 'Seconds' } }
+            }
+        }
+    });
+    </script>
+    {% endif %}
+</body>
+</html>
+"""
+TEMPLATE = app.jinja_env.from_string(HTML)
+
+# -------- ROUTES --------
+@app.route('/')
+def dashboard():
+    mark = _watermark()
+    with _page_lock:
+        if _page_cache['watermark'] == mark:
+            return _page_cache['html']
+    html = TEMPLATE.render(manifest_data=latest_manifest(MANIFEST_PATH, 10) if os.path.exists(MANIFEST_PATH) else [],
+                           runs=recent_runs(10),
+                           stages=stage_chart(stage_breakdown(30)))
+    with _page_lock:
+        _page_cache.update(watermark=mark, html=html)
+    return html
+
+
+# -------- JSON API --------
+# Keyset pagination: pages are ordered newest-first by id and the next page
+# starts below the smallest id returned (`next`), so every page is an index
+# range scan no matter how deep the client has paged.
+
+MAX_PAGE = 1000
+RUN_COLUMNS = ['id', 'date', 'hostname', 'start_time', 'end_time', 'runtime_sec', 'runtime_min', 'status']
+MANIFEST_COLUMNS = ['id', 'filename', 'hash', 'timestamp']
+
+def _filters(date_column, extra):
+    """WHERE clause + args from the common query parameters (before, since, until) plus `extra`."""
+    where, args = [], []
+    if request.args.get('before'):
+        where.append('id < ?')
+        args.append(request.args.get('before', type=int))
+    if request.args.get('since'):
+        where.append(f'{date_column} >= ?')
+        args.append(request.args['since'])
+    if request.args.get('until'):
+        where.append(f'{date_column} <= ?')
+        args.append(request.args['until'])
+    for column in extra:
+        if request.args.get(column):
+            where.append(f'{column} = ?')
+            args.append(request.args[column])
+    return (' WHERE ' + ' AND '.join(where)) if where else '', args
+
+def _page(path, table, columns, date_column, extra):
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE))
+    where, args = _filters(date_column, extra)
+    rows = _query(path, f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY id DESC LIMIT ?", (*args, limit))
+    return jsonify(items=rows, next=rows[-1]['id'] if len(rows) == limit else None)
+
+@app.route('/api/runs')
+def api_runs():
+    """?limit=&before=<id>&since=YYYY-MM-DD&until=YYYY-MM-DD&status=success|failure"""
+    return _page(RUNTIME_DB, 'etl_runtime', RUN_COLUMNS, 'date', ['status'])
+
+@app.route('/api/manifest')
+def api_manifest():
+    """?limit=&before=<id>&since=<ISO timestamp>&until=<ISO timestamp>&filename=&hash="""
+    return _page(MANIFEST_PATH, 'manifest', MANIFEST_COLUMNS, 'timestamp', ['filename', 'hash'])
+
+@app.route('/api/stages')
+def api_stages():
+    """?days=30 -> per-module, per-stage averages from etl_stage_timing."""
+    return jsonify(items=stage_breakdown(max(1, request.args.get('days', 30, type=int))))
+
+@app.route('/api/trends')
+def api_trends():
+    """Per-period rollup rows and a p50/p95 summary: ?days=90&grain=day|week&scope=run|<module>."""
+    days = max(1, request.args.get('days', 90, type=int))
+    grain = 'week' if request.args.get('grain') == 'week' else 'day'
+    scope = request.args.get('scope', 'run')
+    since = rollups.parse_since(f'{days}d')
+    conn = _conn(RUNTIME_DB)
+    try:
+        items = rollups.series(conn, since, scope=scope, grain=grain) if conn else []
+        total = rollups.summary(conn, since, scope=scope) if conn else None
+    except sqlite3.OperationalError:  # stats db not migrated to the rollup schema yet
+        items, total = [], None
+    return jsonify(items=items, summary=total)
+
+# -------- EXPORT --------
+def _stream_rows(path, sql, args, batch=5000):
+    """Yield rows from a private connection in fixed-size batches, oldest first."""
+    conn = sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
+    try:
+        cur = conn.execute(sql, args)
+        while rows := cur.fetchmany(batch):
+            yield from rows
+    finally:
+        conn.close()
+
+def _csv_lines(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() > 64 * 1024:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
 
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row))) + '\n'
 
 @app.route('/download')
 def download_csv():
-    """Serve the entire ETL runtime CSV for download."""
-    if not os.path.exists(RUNTIME_CSV):
-        return "No CSV file found yet.", 404
-
-    # Stream the CSV to avoid filesystem permissions issues
-    with open(RUNTIME_CSV, 'rb') as f:
-        data = io.BytesIO(f.read())
-    data.seek(0)
-    filename = f"etl_runtime_stats_{datetime.date.today()}.csv"
-    return send_file(data, mimetype='text/csv', as_attachment=True, download_name=filename)
+    """Stream the run history as CSV or NDJSON (?format=ndjson), with the /api/runs filters."""
+    fmt = request.args.get('format', 'csv')
+    stamp = datetime.date.today()
+    if not os.path.exists(RUNTIME_DB):
+        if not os.path.exists(RUNTIME_CSV):
+            return "No CSV file found yet.", 404
+        # Legacy CSV only: send_file streams it from disk in blocks
+        return send_file(os.path.abspath(RUNTIME_CSV), mimetype='text/csv', as_attachment=True,
+                         download_name=f"etl_runtime_stats_{stamp}.csv")
+    where, args = _filters('date', ['status'])
+    columns = RUN_COLUMNS[1:]
+    rows = _stream_rows(RUNTIME_DB, f"SELECT {', '.join(columns)} FROM etl_runtime{where} ORDER BY id", args)
+    if fmt == 'ndjson':
+        body, mimetype = _ndjson_lines(columns, rows), 'application/x-ndjson'
+    else:
+        body, mimetype, fmt = _csv_lines(columns, rows), 'text/csv', 'csv'
+    headers = {'Content-Disposition': f'attachment; filename=etl_runtime_stats_{stamp}.{fmt}'}
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
 
 
 if __name__ == '__main__':
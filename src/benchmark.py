@@ -0,0 +1,382 @@
+import os, sys, time, tempfile, argparse, json, logging, random, resource, multiprocessing, hashlib, platform, shutil
+import datetime, yaml
+
+def _rchar():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+def _measure(fn):
+    before, t0 = _rchar(), time.perf_counter()
+    fn()
+    elapsed, after = time.perf_counter() - t0, _rchar()
+    return {'seconds': round(elapsed, 4), 'bytes_read': None if before is None else after - before}
+
+def make_irb_csv(path, rows, seed=0):
+    rnd = random.Random(seed)
+    statuses = ['Active', 'Closed', 'Pending']
+    with open(path, 'w') as f:
+        f.write('protocol_id,study_title,pi_name,status,last_updated\n')
+        for i in range(rows):
+            f.write(f"IRB{i:08d},Study {rnd.randint(1, 10**6)},Dr. PI {rnd.randint(1, 5000)},"
+                    f"{rnd.choice(statuses)},2025-10-{rnd.randint(1, 28):02d}\n")
+    return path
+
+def _cfg(root):
+    return {'paths': {k: os.path.join(root, k) + '/' for k in ('staging', 'curated')} |
+                     {'manifest': os.path.join(root, 'metadata', 'manifest.db'),
+                      'stats_db': os.path.join(root, 'logs', 'etl_stats.db'),
+                      'warehouse': os.path.join(root, 'warehouse', 'curated.db')}}  # never the caller's
+
+# -------- frozen baseline stages --------
+# Copies of the original multi-read stages, kept as they were so the comparison does not drift as src/ changes.
+def _legacy_validate_schema(file_path, module_cfg):
+    import pandas as pd
+    df = pd.read_csv(file_path)
+    expected = module_cfg['expected_columns']
+    missing = [c for c in expected if c not in df.columns]
+    if missing:
+        raise ValueError(f"{file_path} missing columns: {missing}")
+    logging.info(f"{file_path} passed schema validation")
+    return df
+
+def _legacy_clean_data(input_file, output_dir):
+    import pandas as pd
+    df = pd.read_csv(input_file)
+    df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
+    df['load_date'] = datetime.date.today().isoformat()
+    os.makedirs(output_dir, exist_ok=True)
+    out = os.path.join(output_dir, os.path.basename(input_file))
+    df.to_csv(out, index=False)
+    logging.info(f"Cleaned {input_file} -> {out}")
+    return out
+
+def _legacy_promote_to_curated(staged_file, curated_dir):
+    os.makedirs(curated_dir, exist_ok=True)
+    dest = os.path.join(curated_dir, os.path.basename(staged_file))
+    shutil.copy2(staged_file, dest)
+    logging.info(f"Promoted {staged_file} to curated zone")
+    return dest
+
+def _legacy_profile_data(file_path):
+    import pandas as pd
+    df = pd.read_csv(file_path)
+    nulls = int(df.isna().sum().sum())
+    completeness = 100 - (nulls / (len(df) * len(df.columns))) * 100
+    logging.info(f"{file_path}: {len(df)} rows, completeness {completeness:.2f}%")
+    return completeness
+
+def _legacy_md5(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        while chunk := f.read(8192): h.update(chunk)
+    return h.hexdigest()
+
+def _legacy_update_manifest(file_path, manifest_path):
+    entry = {
+        'filename': os.path.basename(file_path),
+        'hash': _legacy_md5(file_path),
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    manifest = []
+    if os.path.exists(manifest_path):
+        manifest = json.load(open(manifest_path))
+    manifest.append(entry)
+    json.dump(manifest, open(manifest_path, 'w'), indent=2)
+    logging.info(f"Manifest updated with {file_path}")
+
+def bench_bytes_read(rows):
+    """Compare bytes read per file by the frozen multi-read stages and the single-parse pipeline."""
+    from src.pipeline import process_file
+
+    module_cfg = {'expected_columns': ['protocol_id', 'study_title', 'pi_name', 'status', 'last_updated']}
+    with tempfile.TemporaryDirectory() as root:
+        src = make_irb_csv(os.path.join(root, 'IRB_PROTOCOL_bench.csv'), rows)
+        cfg = _cfg(root)
+        legacy_root = os.path.join(root, 'legacy')
+
+        def legacy():
+            _legacy_validate_schema(src, module_cfg)
+            staged = _legacy_clean_data(src, os.path.join(legacy_root, 'staging'))
+            curated = _legacy_promote_to_curated(staged, os.path.join(legacy_root, 'curated'))
+            _legacy_profile_data(curated)
+            _legacy_update_manifest(curated, os.path.join(legacy_root, 'metadata', 'manifest.json'))
+
+        legacy()  # warm imports and page cache
+        results = {'rows': rows, 'input_bytes': os.path.getsize(src), 'legacy': _measure(legacy)}
+        results['pipeline'] = _measure(lambda: process_file('irb', src, module_cfg, cfg))
+    return results
+
+def bench_hashing(size_mb=256, files=8):
+    """Hash throughput in MB/s: the old MD5/8 KB loop vs src.hashing, on page-cache-warm files."""
+    from src import hashing
+    results = {'size_mb': size_mb, 'files': files}
+    with tempfile.TemporaryDirectory() as root:
+        big = os.path.join(root, 'big.bin')
+        with open(big, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+        _legacy_md5(big)
+        def mbps(fn):
+            t0 = time.perf_counter()
+            fn()
+            return round(size_mb / (time.perf_counter() - t0), 1)
+        results['legacy_md5_8k'] = mbps(lambda: _legacy_md5(big))
+        for algo in ('md5', 'sha256', 'blake2b'):
+            results[f'{algo}_4m'] = mbps(lambda: hashing.hash_file(big, algo, use_mmap=False, cache=False))
+            results[f'{algo}_mmap'] = mbps(lambda: hashing.hash_file(big, algo, use_mmap=True, cache=False))
+        parts = [big]
+        for i in range(1, files):
+            parts.append(os.path.join(root, f'part{i}.bin'))
+            os.link(big, parts[-1])  # same bytes, no extra disk
+        t0 = time.perf_counter()
+        for p in parts:
+            _legacy_md5(p)
+        results['legacy_serial_mb_s'] = round(size_mb * files / (time.perf_counter() - t0), 1)
+        t0 = time.perf_counter()
+        hashing.hash_files(parts, cache=False)
+        results['hash_files_parallel_mb_s'] = round(size_mb * files / (time.perf_counter() - t0), 1)
+        results['cpu_count'] = os.cpu_count()
+    return results
+
+def _in_child(fn, *args):
+    """Run fn in a fresh forked process; return (result or {'error': ...}, peak RSS in MB)."""
+    def child(q):
+        try:
+            result = fn(*args)
+        except Exception as e:
+            result = {'error': f'{type(e).__name__}: {e}'}
+        q.put((result, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+    q = multiprocessing.get_context('fork').Queue()
+    p = multiprocessing.get_context('fork').Process(target=child, args=(q,))
+    p.start()
+    result, peak = q.get()
+    p.join()
+    return result, round(peak, 1)
+
+def _peak_rss_mb(fn, *args):
+    """Run fn in a fresh child process and return its peak RSS in MB."""
+    return _in_child(fn, *args)[1]
+
+FLAT_TOLERANCE = 1.25
+
+def bench_streaming_memory(sizes=(500_000, 2_000_000), chunk_rows=50_000):
+    """Peak RSS of the in-memory pipeline vs streaming mode, per file size; streaming should stay flat."""
+    from src.pipeline import process_file
+    module_cfg = {'expected_columns': ['protocol_id', 'study_title', 'pi_name', 'status', 'last_updated']}
+    runs = []
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            src = make_irb_csv(os.path.join(root, 'IRB_PROTOCOL_bench.csv'), rows)
+            cfg = _cfg(root)
+            streaming = cfg | {'settings': {'stream_threshold_mb': 0, 'chunk_rows': chunk_rows}}
+            runs.append({'rows': rows, 'input_bytes': os.path.getsize(src),
+                         'in_memory_peak_rss_mb': _peak_rss_mb(process_file, 'irb', src, module_cfg, cfg),
+                         'streaming_peak_rss_mb': _peak_rss_mb(process_file, 'irb', src, module_cfg, streaming)})
+    growth = runs[-1]['streaming_peak_rss_mb'] / runs[0]['streaming_peak_rss_mb']
+    return {'chunk_rows': chunk_rows, 'sizes': runs, 'streaming_growth': round(growth, 3),
+            'streaming_flat': growth <= FLAT_TOLERANCE}
+
+# -------- CSV engines --------
+def wide_grants_cfg(extra_columns=40):
+    """Grants schema widened with extra string/float/category/date columns."""
+    cfg = _module_cfg('grants')
+    kinds = ['string', 'float', 'category', 'date']
+    extra = {f'extra_{i:02d}': kinds[i % len(kinds)] for i in range(extra_columns)}
+    return cfg | {'expected_columns': cfg['expected_columns'] + list(extra),
+                  'columns': dict(cfg['columns']) | extra}
+
+def _parse(path, engine, types):
+    from src import csv_io
+    t0 = time.perf_counter()
+    if engine == 'pandas_default':
+        df = __import__('pandas').read_csv(path)
+    else:
+        csv_io.configure({'settings': {'csv_engine': engine}})
+        df = csv_io.read_frame(path, types)
+    return {'seconds': round(time.perf_counter() - t0, 3),
+            'frame_mb': round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1)}
+
+def _write(path, out, engine, types):
+    from src import csv_io
+    csv_io.configure({'settings': {'csv_engine': engine}})
+    df = csv_io.read_frame(path, types)
+    t0 = time.perf_counter()
+    if engine == 'pandas_default':
+        df.to_csv(out, index=False)
+    else:
+        with open(out, 'wb') as f:
+            csv_io.write_frame(df, f)
+    return {'seconds': round(time.perf_counter() - t0, 3)}
+
+def bench_csv_engines(rows, extra_columns=40):
+    """Parse/write speed and peak RSS on a wide Grants file: pandas defaults vs the csv_io engines."""
+    from src.synthetic_data import generate_csv
+    from src.validate_schema import column_types
+    module_cfg = wide_grants_cfg(extra_columns)
+    types = column_types(module_cfg)
+    results = {'rows': rows, 'columns': len(module_cfg['expected_columns'])}
+    with tempfile.TemporaryDirectory() as root:
+        path = generate_csv(os.path.join(root, 'GRANTS_wide.csv'), module_cfg, rows, null_rate=0.01)
+        mb = os.path.getsize(path) / 1024 / 1024
+        results['input_mb'] = round(mb, 1)
+        for engine in ('pandas_default', 'c', 'pyarrow'):
+            parsed, peak = _in_child(_parse, path, engine, types)
+            written, _ = _in_child(_write, path, os.path.join(root, 'out.csv'), engine, types)
+            results[engine] = {'parse_seconds': parsed['seconds'], 'parse_mb_s': round(mb / parsed['seconds'], 1),
+                               'frame_mb': parsed['frame_mb'], 'peak_rss_mb': peak,
+                               'write_seconds': written['seconds'],
+                               'write_mb_s': round(mb / max(written['seconds'], 1e-9), 1)}
+    return results
+
+# -------- suite --------
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _module_cfg(module):
+    with open(os.path.join(REPO_ROOT, 'config', 'modules', f'{module}.yaml')) as f:
+        return yaml.safe_load(f)
+
+def _suite_cfg(root):
+    """Temp-dir paths with the production `settings` block."""
+    with open(os.path.join(REPO_ROOT, 'config', 'settings.yaml')) as f:
+        settings = yaml.safe_load(f).get('settings', {})
+    cfg = _cfg(root)
+    cfg['paths']['change_cache'] = os.path.join(root, 'metadata', 'change_cache.json')
+    return cfg | {'settings': settings}
+
+def _run_stages(module, path, module_cfg, cfg):
+    from src.pipeline import process_file
+    return process_file(module, path, module_cfg, cfg)['timings']
+
+def _run_module(module, root, cfg):
+    from src.main import run_module
+    os.chdir(root)  # the scheduler discovers data/incoming/ and config/modules/ relative to the cwd
+    report = run_module(module, cfg, jobs=1)
+    if report['failed']:
+        raise RuntimeError(report['failed'][0]['error'])
+    return len(report['processed'])
+
+def _rates(seconds, rows, mb):
+    seconds = max(seconds, 1e-9)
+    return {'rows_per_s': round(rows / seconds, 1), 'mb_per_s': round(mb / seconds, 2)}
+
+def bench_scenario(module, rows, null_rate=0.0, dirty_headers=False, seed=0):
+    from src.synthetic_data import generate_csv
+    module_cfg = _module_cfg(module)
+    with tempfile.TemporaryDirectory() as root:
+        os.symlink(os.path.join(REPO_ROOT, 'config'), os.path.join(root, 'config'))
+        path = os.path.join(root, 'data', 'incoming', f'{module.upper()}_bench_{rows}.csv')
+        t0 = time.perf_counter()
+        generate_csv(path, module_cfg, rows, seed, null_rate, dirty_headers)
+        mb = os.path.getsize(path) / 1024 / 1024
+        result = {'module': module, 'rows': rows, 'input_mb': round(mb, 2), 'null_rate': null_rate,
+                  'dirty_headers': dirty_headers, 'generate_seconds': round(time.perf_counter() - t0, 3)}
+
+        timings, peak = _in_child(_run_stages, module, path, module_cfg, _suite_cfg(os.path.join(root, 'stages')))
+        if isinstance(timings, dict):
+            result['stages'] = timings | {'peak_rss_mb': peak}
+        else:
+            result['stages'] = {t['stage']: {'seconds': t['wall_sec'], 'cpu_seconds': t['cpu_sec'],
+                                             **_rates(t['wall_sec'], rows, mb), 'peak_rss_mb': t['peak_rss_mb']}
+                                for t in timings}
+
+        t0 = time.perf_counter()
+        outcome, peak = _in_child(_run_module, module, root, _suite_cfg(root))
+        seconds = time.perf_counter() - t0
+        result['run_module'] = {'seconds': round(seconds, 3), **_rates(seconds, rows, mb), 'peak_rss_mb': peak}
+        if isinstance(outcome, dict):
+            result['run_module']['error'] = outcome['error']
+    return result
+
+def scenario_key(module, rows, null_rate, dirty_headers):
+    return f"{module}/{rows}" + (f"/nulls={null_rate}" if null_rate else '') + ('/dirty' if dirty_headers else '')
+
+def run_suite(modules, sizes, null_rate=0.0, dirty_headers=False, seed=0):
+    scenarios = {}
+    for module in modules:
+        for rows in sizes:
+            key = scenario_key(module, rows, null_rate, dirty_headers)
+            logging.warning(f"benchmark {key}")
+            scenarios[key] = bench_scenario(module, rows, null_rate, dirty_headers, seed)
+    return {'meta': {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+                     'python': platform.python_version(), 'platform': platform.platform(),
+                     'cpu_count': os.cpu_count(), 'seed': seed},
+            'scenarios': scenarios}
+
+MIN_COMPARE_SECONDS = 0.05  # shorter timings are mostly noise
+
+def _metrics(scenario):
+    """(name, value, higher_is_better) for every comparable number in a scenario."""
+    out = []
+    for name, m in [('run_module', scenario.get('run_module', {}))] + \
+                   [(f'stage:{k}', v) for k, v in scenario.get('stages', {}).items() if isinstance(v, dict)]:
+        if 'error' in m or m.get('seconds', 0) < MIN_COMPARE_SECONDS:
+            continue
+        out += [(f'{name}.rows_per_s', m.get('rows_per_s'), True), (f'{name}.peak_rss_mb', m.get('peak_rss_mb'), False)]
+    return out
+
+def compare(results, baseline, tolerance=0.1):
+    """Per-scenario ratios against the baseline and the metrics that regressed beyond tolerance."""
+    comparison, regressions = {}, []
+    for key, scenario in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(key)
+        if not base:
+            continue
+        before = {name: value for name, value, _ in _metrics(base)}
+        for name, value, higher in _metrics(scenario):
+            if not value or not before.get(name):
+                continue
+            ratio = value / before[name]
+            comparison[f'{key} {name}'] = round(ratio, 3)
+            if (ratio < 1 - tolerance) if higher else (ratio > 1 + tolerance):
+                regressions.append({'scenario': key, 'metric': name, 'baseline': before[name],
+                                    'current': value, 'ratio': round(ratio, 3)})
+    return {'tolerance': tolerance, 'ratios': comparison, 'regressions': regressions}
+
+def main_suite(args):
+    results = run_suite(args.modules, args.sizes, args.null_rate, args.dirty_headers, args.seed)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['comparison'] = compare(results, json.load(f), args.tolerance)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    return 1 if results.get('comparison', {}).get('regressions') else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--hash-mb', type=int, default=256)
+    parser.add_argument('--suite', action='store_true', help='Run the synthetic-data benchmark suite.')
+    parser.add_argument('--csv', action='store_true', help='Compare CSV engines on a wide Grants file.')
+    parser.add_argument('--extra-columns', type=int, default=40)
+    parser.add_argument('--modules', nargs='+', default=['irb', 'grants'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000])
+    parser.add_argument('--null-rate', type=float, default=0.0)
+    parser.add_argument('--dirty-headers', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='Compare against a stored suite result.')
+    parser.add_argument('--save-baseline', help='Store this suite result as a baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if args.suite:
+        sys.exit(main_suite(args))
+    if args.csv:
+        json.dump(bench_csv_engines(args.rows, args.extra_columns), sys.stdout, indent=2)
+        print()
+        sys.exit(0)
+    # Memory first: the forked children inherit whatever the parent has grown to.
+    results = {'streaming_memory': bench_streaming_memory(),
+               'bytes_read': bench_bytes_read(args.rows),
+               'hashing_mb_s': bench_hashing(args.hash_mb)}
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    sys.exit(0 if results['streaming_memory']['streaming_flat'] else 1)
@@ -0,0 +1,70 @@
+import json, os, datetime, time
+from src.metadata_utils import file_hash
+
+def cache_path(cfg):
+    return cfg['paths'].get('change_cache') or os.path.join(os.path.dirname(cfg['paths']['manifest']), 'change_cache.json')
+
+def load_cache(path):
+    """{module: {path: fingerprint}}; a module that fails a file retries it even if another module took it."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        cache = json.load(f)
+    if any('hash' in e for e in cache.values()):  # written before entries were keyed by module
+        legacy, cache = cache, {}
+        for p, e in legacy.items():
+            cache.setdefault(e['module'], {})[p] = e
+    return cache
+
+SAVE_INTERVAL_SEC = 30
+_saved_at = {}
+
+def save_cache(cache, path, min_interval=0):
+    """Write the cache atomically, skipping the write if the last one was under min_interval seconds ago."""
+    now = time.monotonic()
+    if min_interval and now - _saved_at.get(path, float('-inf')) < min_interval:
+        return False
+    _saved_at[path] = now
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+    return True
+
+def prune(cache):
+    """Drop entries for files that no longer exist; returns how many."""
+    gone = [(m, p) for m, entries in cache.items() for p in entries if not os.path.exists(p)]
+    for m, p in gone:
+        del cache[m][p]
+    return len(gone)
+
+def hash_index(cache):
+    return {(m, e['hash']): p for m, entries in cache.items() for p, e in entries.items()}
+
+def fingerprint(path, st=None):
+    st = st or os.stat(path)
+    return {'size': st.st_size, 'mtime': st.st_mtime, 'hash': file_hash(path)}
+
+def is_unchanged(cache, module, path, st=None):
+    st = st or os.stat(path)
+    entry = cache.get(module, {}).get(path)
+    return bool(entry) and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime
+
+def check(cache, module, path, by_hash):
+    """Return (skip reason or None, fingerprint); by_hash also covers files already scheduled in this run."""
+    st = os.stat(path)
+    if is_unchanged(cache, module, path, st):
+        return 'unchanged since last run (size/mtime match)', cache[module][path]
+    fp = fingerprint(path, st)
+    seen = by_hash.get((module, fp['hash']))
+    if seen is None:
+        return None, fp
+    if seen not in cache.get(module, {}):
+        return f'same content as {seen}, already scheduled in this run', fp
+    reason = 'content unchanged (hash match)' if seen == path else f'same content already processed as {seen}'
+    record(cache, module, path, fp)
+    return reason, fp
+
+def record(cache, module, path, fp):
+    cache.setdefault(module, {})[path] = dict(fp, module=module, processed_at=datetime.datetime.now().isoformat())
@@ -0,0 +1,30 @@
+import os, copy, threading
+
+SETTINGS_PATH = './config/settings.yaml'
+
+_cache, _lock = {}, threading.Lock()
+
+def cached(path, build):
+    """build(path) once per mtime of `path`; later calls return the stored value."""
+    mtime = os.stat(path).st_mtime_ns
+    key = (os.path.abspath(path), build)
+    with _lock:
+        hit = _cache.get(key)
+        if hit and hit[0] == mtime:
+            return hit[1]
+    value = build(path)
+    with _lock:
+        _cache[key] = (mtime, value)
+    return value
+
+def parse_yaml(path):
+    import yaml  # parsing is rare once cached; keep it off the import path
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+def load_yaml(path):
+    """Parsed YAML; a copy, so callers may adjust it without touching the cache."""
+    return copy.deepcopy(cached(path, parse_yaml))
+
+def load_settings(path=SETTINGS_PATH):
+    return load_yaml(path)
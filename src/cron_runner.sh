@@ -57,16 +57,11 @@ else
   run_status="failure"
 fi
 
-# -------- LOG RUNTIME TO CSV --------
-$PYTHON - <<END
-from src.log_runtime_stats import log_runtime_csv
-log_runtime_csv("$LOG_DIR", $runtime, "$run_status", "$start_time_fmt", "$end_time_fmt")
-END
-
-# -------- LOG RUNTIME TO SQLITE --------
+# -------- LOG RUNTIME (SQLITE + CSV MIRROR) --------
 $PYTHON - <<END
 from src.log_runtime_sqlite import log_runtime_sqlite
-log_runtime_sqlite("$LOG_DIR/etl_stats.db", $runtime, "$run_status", "$start_time_fmt", "$end_time_fmt")
+log_runtime_sqlite("$LOG_DIR/etl_stats.db", $runtime, "$run_status", "$start_time_fmt", "$end_time_fmt",
+                   csv_dir="$LOG_DIR")
 END
 
 # -------- SLACK ALERT FUNCTION --------
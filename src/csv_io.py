@@ -0,0 +1,150 @@
+import io, os, csv, gzip, bz2
+import pandas as pd
+try:
+    import pyarrow as pa, pyarrow.csv as pacsv
+except ImportError:  # the C engine covers everything except speed
+    pa = pacsv = None
+
+COMPRESSION = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}
+BLOCK_SIZE = 8 * 1024 * 1024
+MIN_BLOCK_SIZE = 1024 * 1024
+READAHEAD_BLOCKS = 32  # pyarrow's streaming reader queues up to this many blocks ahead of the consumer
+_engine = 'auto'
+
+def configure(cfg):
+    global _engine
+    _engine = cfg.get('settings', {}).get('csv_engine', 'auto')
+
+def engine():
+    if _engine == 'c' or pa is None:
+        return 'c'
+    return 'pyarrow'
+
+def compression(path):
+    return COMPRESSION.get(os.path.splitext(path)[1].lower())
+
+def plain_name(name):
+    """'GRANTS_2025.csv.gz' -> 'GRANTS_2025.csv'."""
+    return os.path.splitext(name)[0] if compression(name) else name
+
+def is_csv(name):
+    return plain_name(name).lower().endswith('.csv')
+
+def open_binary(path):
+    kind = compression(path)
+    if kind == 'gzip':
+        return gzip.open(path, 'rb')
+    if kind == 'bz2':
+        return bz2.open(path, 'rb')
+    if kind == 'zstd':
+        if pa is None:
+            raise ValueError(f"{path}: reading .zst needs pyarrow")
+        return pa.input_stream(path, compression='zstd')
+    return open(path, 'rb')
+
+def normalize_header(name):
+    return str(name).strip().lower().replace(' ', '_')
+
+def read_header(path):
+    """Column names from the first line only."""
+    line = b''
+    with open_binary(path) as raw:
+        while b'\n' not in line and (block := raw.read(64 * 1024)):
+            line += block
+    return next(csv.reader([line.split(b'\n', 1)[0].decode('utf-8-sig')]), [])
+
+# -------- dtypes --------
+# Declared type -> pandas dtype, the same for both engines; bool/date/datetime
+# stay text here and are parsed by the schema and curated steps.
+DTYPES = {'int': 'Int64', 'float': 'float64', 'category': 'category'}
+
+def dtype(kind):
+    return DTYPES.get(kind, 'string')
+
+def _dtypes(header, types):
+    types = types or {}
+    return {raw: dtype(types.get(normalize_header(raw))) for raw in header}
+
+def _arrow_types(header, types):
+    arrow = {'Int64': pa.int64(), 'float64': pa.float64(), 'category': pa.dictionary(pa.int32(), pa.string()),
+             'string': pa.string()}
+    return {raw: arrow[d] for raw, d in _dtypes(header, types).items()}
+
+def _to_pandas(table):
+    return table.to_pandas(self_destruct=True, types_mapper={pa.int64(): pd.Int64Dtype(),
+                                                             pa.string(): pd.StringDtype()}.get)
+
+def _parse_error(path, e):
+    return ValueError(f"{path}: value does not match its declared column type: {e}")
+
+def _arrow_options(path, types, block_size=BLOCK_SIZE):
+    convert = pacsv.ConvertOptions(column_types=_arrow_types(read_header(path), types),
+                                   strings_can_be_null=True)
+    return pacsv.ReadOptions(block_size=block_size), convert
+
+def row_width(path, sample=256 * 1024):
+    """Average bytes per line over the (decompressed) head of the file."""
+    with open_binary(path) as raw:
+        head = raw.read(sample)
+    return max(1, len(head) // max(1, head.count(b'\n')))
+
+def stream_block_size(path, chunk_rows):
+    """Block size whose full readahead queue holds about one chunk, so streaming memory does not grow with the file."""
+    return min(BLOCK_SIZE, max(MIN_BLOCK_SIZE, chunk_rows * row_width(path) // READAHEAD_BLOCKS))
+
+def _open_arrow(path):
+    return pa.input_stream(path, compression=compression(path))
+
+# -------- readers --------
+def read_frame(path, types=None, nrows=None):
+    """Whole file (or its first nrows rows) as a DataFrame."""
+    try:
+        if engine() == 'pyarrow' and nrows is None:
+            read_opts, convert_opts = _arrow_options(path, types)
+            with _open_arrow(path) as f:
+                return _to_pandas(pacsv.read_csv(f, read_options=read_opts, convert_options=convert_opts))
+        with open_binary(path) as f:
+            return pd.read_csv(f, dtype=_dtypes(read_header(path), types), nrows=nrows)
+    except (ValueError, TypeError) as e:  # pa.ArrowInvalid is a ValueError
+        raise _parse_error(path, e) from e
+
+def read_chunks(path, types=None, chunk_rows=200_000):
+    """Yield DataFrames of about chunk_rows rows (pyarrow rounds up to whole blocks)."""
+    try:
+        yield from _chunks(path, types, chunk_rows)
+    except (ValueError, TypeError) as e:
+        raise _parse_error(path, e) from e
+
+def _chunks(path, types, chunk_rows):
+    if engine() == 'c':
+        with open_binary(path) as f:
+            yield from pd.read_csv(f, dtype=_dtypes(read_header(path), types), chunksize=chunk_rows)
+        return
+    read_opts, convert_opts = _arrow_options(path, types, stream_block_size(path, chunk_rows))
+    with _open_arrow(path) as f:
+        batches, rows = [], 0
+        for batch in pacsv.open_csv(f, read_options=read_opts, convert_options=convert_opts):
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= chunk_rows:
+                table, batches, rows = pa.Table.from_batches(batches), [], 0
+                yield _to_pandas(table)
+        if batches:
+            yield _to_pandas(pa.Table.from_batches(batches))
+
+# -------- writer --------
+def write_frame(df, sink, header=True):
+    """Append df as CSV to a binary file-like sink; pyarrow writes it whenever installed, whatever parsed it."""
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None  # mixed-type object column; pandas can still write it
+        if table is not None:
+            pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=header))
+            return
+    text = io.TextIOWrapper(sink, encoding='utf-8', newline='', write_through=True)
+    try:
+        df.to_csv(text, index=False, header=header)
+    finally:
+        text.detach()
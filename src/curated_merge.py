@@ -0,0 +1,205 @@
+import sqlite3, os, datetime, logging, re
+import numpy as np, pandas as pd, pyarrow.parquet as pq
+from src.validate_schema import column_types, parse_bool
+from src.csv_io import read_chunks
+
+BATCH_ROWS = 100_000
+SQL_TYPES = {'int': 'INTEGER', 'float': 'REAL', 'bool': 'INTEGER'}
+
+def primary_key(module_cfg):
+    pk = module_cfg.get('primary_key')
+    return [pk] if isinstance(pk, str) else list(pk or [])
+
+def warehouse_path(cfg):
+    return cfg['paths'].get('warehouse', './data/warehouse/curated.db')
+
+DATE_IN_NAME = re.compile(r'(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)')
+
+def snapshot_date(name):
+    """ISO date embedded in a snapshot's file name, ignoring extensions; None if there is none."""
+    stem = os.path.basename(name).split('.')[0]
+    for y, m, d in reversed(DATE_IN_NAME.findall(stem)):
+        try:
+            return datetime.date(int(y), int(m), int(d)).isoformat()
+        except ValueError:
+            continue
+    return None
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+# -------- canonical rows --------
+def canonical(df, columns, types):
+    """Cast to declared types so hashes do not depend on the CSV engine or file format."""
+    out = {}
+    for c in columns:
+        s, kind = df[c], types.get(c, 'string')
+        if kind in ('int', 'float'):
+            v = pd.to_numeric(s, errors='coerce').astype('float64')
+            out[c] = v.where(v % 1 == 0).astype('Int64') if kind == 'int' else v
+        elif kind in ('date', 'datetime'):
+            fmt = '%Y-%m-%d' if kind == 'date' else '%Y-%m-%dT%H:%M:%S'
+            out[c] = pd.to_datetime(s, errors='coerce').dt.strftime(fmt).astype('string')
+        elif kind == 'bool':
+            out[c] = parse_bool(s)
+        else:
+            out[c] = s.astype('string')
+    return pd.DataFrame(out, index=df.index)
+
+def row_hashes(canon):
+    return pd.util.hash_pandas_object(canon, index=False, categorize=False).to_numpy().view('int64')
+
+def _records(canon):
+    return list(canon.astype(object).where(canon.notna(), None).itertuples(index=False, name=None))
+
+# -------- tables --------
+def ensure_tables(conn, module, columns, pk, types):
+    cur, hist = f'{module}_current', f'{module}_history'
+    defs = ', '.join(f"{_q(c)} {SQL_TYPES.get(types.get(c), 'TEXT')}" for c in columns)
+    keys = ', '.join(_q(c) for c in pk)
+    conn.executescript(f"""
+    CREATE TABLE IF NOT EXISTS {_q(cur)} ({defs}, row_hash INTEGER, valid_from TEXT, source TEXT,
+                                          PRIMARY KEY ({keys}));
+    CREATE TABLE IF NOT EXISTS {_q(hist)} ({defs}, row_hash INTEGER, valid_from TEXT, valid_to TEXT,
+                                          change TEXT, end_reason TEXT, source TEXT);
+    CREATE INDEX IF NOT EXISTS {_q(f'idx_{hist}_key')} ON {_q(hist)} ({keys}, valid_from);
+    CREATE INDEX IF NOT EXISTS {_q(f'idx_{hist}_open')} ON {_q(hist)} ({keys}) WHERE valid_to IS NULL;
+    CREATE TABLE IF NOT EXISTS merge_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, module TEXT, source TEXT, merged_at TEXT,
+        rows INTEGER, inserted INTEGER, updated INTEGER, deleted INTEGER, unchanged INTEGER);
+    CREATE INDEX IF NOT EXISTS idx_merge_log_module ON merge_log (module, id);
+    """)
+    if 'snapshot_date' not in {r[1] for r in conn.execute('PRAGMA table_info(merge_log)')}:
+        conn.execute('ALTER TABLE merge_log ADD COLUMN snapshot_date TEXT')
+    for table in (cur, hist):  # columns added to the YAML later
+        have = {r[1] for r in conn.execute(f'PRAGMA table_info({_q(table)})')}
+        for c in columns:
+            if c not in have:
+                conn.execute(f"ALTER TABLE {_q(table)} ADD COLUMN {_q(c)} {SQL_TYPES.get(types.get(c), 'TEXT')}")
+
+def connect(db_path):
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+# -------- merge --------
+def snapshot_batches(path, columns, types, batch_rows=BATCH_ROWS):
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in read_chunks(path, types, batch_rows):
+            yield chunk
+
+def merge_snapshot(db_path, module, module_cfg, batches, source):
+    """Apply one full snapshot (an iterable of DataFrames); returns the change counts."""
+    pk = primary_key(module_cfg)
+    if not pk:
+        raise ValueError(f"{module}: no primary_key declared")
+    columns, types = list(module_cfg['expected_columns']), column_types(module_cfg)
+    cur, hist = _q(f'{module}_current'), _q(f'{module}_history')
+    name = os.path.basename(source)
+    now = datetime.datetime.now().isoformat(timespec='seconds')
+    keys = ', '.join(_q(c) for c in pk)
+    on = ' AND '.join(f'c.{_q(c)} = b.{_q(c)}' for c in pk)
+    key_where = ' AND '.join(f'{_q(c)} = ?' for c in pk)
+    col_list = ', '.join(_q(c) for c in columns)
+    marks = ', '.join('?' * (len(columns) + 3))
+    stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'skipped': None}
+    snapshot = snapshot_date(name)
+
+    conn = connect(db_path)
+    try:
+        ensure_tables(conn, module, columns, pk, types)
+        last = conn.execute('SELECT snapshot_date, source FROM merge_log WHERE module = ? AND snapshot_date IS NOT NULL '
+                            'ORDER BY snapshot_date DESC LIMIT 1', (module,)).fetchone()
+        if snapshot and last and snapshot < last[0]:
+            stats['skipped'] = f"snapshot {snapshot} is older than {last[1]} ({last[0]}), already merged"
+            logging.warning(f"{module}: not merging {name}: {stats['skipped']}")
+            return stats
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(f'CREATE TEMP TABLE seen ({keys}, PRIMARY KEY ({keys}))')
+        conn.execute(f'CREATE TEMP TABLE batch (idx INTEGER, {keys}, row_hash INTEGER)')
+        for df in batches:
+            df = df[columns]
+            canon = canonical(df, columns, types)
+            if canon[pk].isna().any(axis=None):
+                raise ValueError(f"{name}: null primary key values")
+            hashes = row_hashes(canon)
+            key_rows = _records(canon[pk])
+            conn.execute('DELETE FROM temp.batch')
+            conn.executemany(f'INSERT INTO temp.batch VALUES ({", ".join("?" * (len(pk) + 2))})',
+                             [(i, *k, int(h)) for i, (k, h) in enumerate(zip(key_rows, hashes))])
+            try:
+                conn.execute(f'INSERT INTO temp.seen SELECT {keys} FROM temp.batch')
+            except sqlite3.IntegrityError:
+                raise ValueError(f"{name}: duplicate {'/'.join(pk)} values")
+            found = np.array(conn.execute(f'SELECT b.idx, c.row_hash FROM temp.batch b JOIN {cur} c ON {on}')
+                             .fetchall(), dtype='int64').reshape(-1, 2)
+            new_rows = np.ones(len(canon), dtype=bool)
+            new_rows[found[:, 0]] = False
+            old = np.zeros(len(canon), dtype='int64')
+            old[found[:, 0]] = found[:, 1]
+            changed = ~new_rows & (old != hashes)
+            stats['rows'] += len(canon)
+            stats['inserted'] += int(new_rows.sum())
+            stats['updated'] += int(changed.sum())
+            stats['unchanged'] += int(len(canon) - new_rows.sum() - changed.sum())
+            touched = new_rows | changed
+            if not touched.any():
+                continue
+            rows = [(*r, int(h), now, name) for r, h in zip(_records(canon[touched]), hashes[touched])]
+            if changed.any():
+                conn.executemany(f"UPDATE {hist} SET valid_to = ?, end_reason = 'update' "
+                                 f"WHERE {key_where} AND valid_to IS NULL",
+                                 [(now, *k) for k, c in zip(key_rows, changed) if c])
+            conn.executemany(f'INSERT OR REPLACE INTO {cur} ({col_list}, row_hash, valid_from, source) '
+                             f'VALUES ({marks})', rows)
+            change = ['update' if c else 'insert' for c in changed[touched]]
+            conn.executemany(f'INSERT INTO {hist} ({col_list}, row_hash, valid_from, source, change) '
+                             f'VALUES ({marks}, ?)', [(*r, ch) for r, ch in zip(rows, change)])
+        gone = conn.execute(f'SELECT {keys} FROM {cur} c WHERE NOT EXISTS '
+                            f'(SELECT 1 FROM temp.seen b WHERE {on})').fetchall()
+        if gone:
+            conn.executemany(f"UPDATE {hist} SET valid_to = ?, end_reason = 'delete' "
+                             f"WHERE {key_where} AND valid_to IS NULL", [(now, *k) for k in gone])
+            conn.executemany(f'DELETE FROM {cur} WHERE {key_where}', gone)
+        stats['deleted'] = len(gone)
+        conn.execute('INSERT INTO merge_log (module, source, snapshot_date, merged_at, rows, inserted, updated, '
+                     'deleted, unchanged) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     (module, name, snapshot, now, stats['rows'], stats['inserted'], stats['updated'],
+                      stats['deleted'], stats['unchanged']))
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    logging.info(f"Merged {name} into {module}_current: {stats['inserted']} inserted, {stats['updated']} updated, "
+                 f"{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    return stats
+
+def merge_file(module, curated_path, module_cfg, cfg):
+    """Merge a curated snapshot (Parquet or CSV) for a module with a primary key; None otherwise."""
+    if not primary_key(module_cfg):
+        return None
+    columns, types = list(module_cfg['expected_columns']), column_types(module_cfg)
+    return merge_snapshot(warehouse_path(cfg), module, module_cfg,
+                          snapshot_batches(curated_path, columns, types), curated_path)
+
+def current_row(db_path, module, key):
+    """Point lookup of one key (a value, or a tuple for composite keys) in <module>_current."""
+    conn = sqlite3.connect(f'file:{os.path.abspath(db_path)}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        cols = [r[1] for r in conn.execute(f"PRAGMA table_info({_q(f'{module}_current')})") if r[5]]
+        key = key if isinstance(key, tuple) else (key,)
+        row = conn.execute(f"SELECT * FROM {_q(f'{module}_current')} WHERE " +
+                           ' AND '.join(f'{_q(c)} = ?' for c in cols), key).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
@@ -0,0 +1,101 @@
+import os, logging, datetime
+import pandas as pd, pyarrow as pa, pyarrow.parquet as pq
+from src.metadata_utils import HashingWriter
+from src.validate_schema import column_types, parse_values
+
+PARTITION_COLS = ['module', 'load_date']
+
+ARROW_TYPES = {
+    'string': pa.string(),
+    'int': pa.int64(),
+    'float': pa.float64(),
+    'bool': pa.bool_(),
+    'date': pa.date32(),
+    'datetime': pa.timestamp('us'),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+}
+
+def coerce_types(df, module_cfg, parsed=None):
+    """Cast a cleaned frame to the module's declared types; unparseable values become null.
+    Columns in `parsed` (from Schema.check_values) are taken as already parsed."""
+    df = df.copy()
+    types, parsed = column_types(module_cfg), parsed or {}
+    for col in df.columns:
+        kind = types.get(col, 'string')
+        if kind in ('int', 'float', 'date', 'datetime', 'bool'):
+            typed = parsed[col] if col in parsed else parse_values(df[col].dropna(), kind)
+            df[col] = typed.reindex(df.index)
+        elif kind == 'category':
+            df[col] = df[col].astype('string').astype('category')
+        else:
+            df[col] = df[col].astype('string')
+    return df
+
+def arrow_schema(columns, module_cfg):
+    types = column_types(module_cfg)
+    return pa.schema([(c, ARROW_TYPES[types.get(c, 'string')]) for c in columns])
+
+def to_arrow(df, module_cfg, parsed=None):
+    df = coerce_types(df.drop(columns=[c for c in PARTITION_COLS if c in df.columns]), module_cfg, parsed)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table.cast(arrow_schema(df.columns, module_cfg)).replace_schema_metadata(None)
+
+def partition_dir(curated_dir, module, load_date):
+    return os.path.join(curated_dir, f'module={module}', f'load_date={load_date}')
+
+class CuratedWriter:
+    """Append frames to one hashed Parquet file, kept hidden until commit() renames it into place."""
+    def __init__(self, curated_dir, module, name, module_cfg, compression='zstd'):
+        self.curated_dir, self.module, self.module_cfg = curated_dir, module, module_cfg
+        self.name = os.path.splitext(name)[0] + '.parquet'
+        self.compression = compression
+        self.path = self.tmp = self.sink = self.writer = None
+
+    def write(self, df, parsed=None):
+        if self.writer is None:
+            load_date = df['load_date'].iloc[0] if len(df) else datetime.date.today().isoformat()
+            out_dir = partition_dir(self.curated_dir, self.module, load_date)
+            os.makedirs(out_dir, exist_ok=True)
+            self.path = os.path.join(out_dir, self.name)
+            self.tmp = os.path.join(out_dir, f'.{self.name}.inprogress')
+            table = to_arrow(df, self.module_cfg, parsed)
+            self.sink = HashingWriter(self.tmp, binary=True)
+            self.writer = pq.ParquetWriter(self.sink, table.schema, compression=self.compression)
+            self.writer.write_table(table)
+            return
+        self.writer.write_table(to_arrow(df, self.module_cfg, parsed).cast(self.writer.schema))
+
+    def close(self):
+        """Finish the file; returns (final path, digest). Call commit() to publish it."""
+        self.writer.close()
+        self.sink.close()
+        return self.path, self.sink.hexdigest()
+
+    def commit(self):
+        os.replace(self.tmp, self.path)
+        logging.info(f"Wrote curated Parquet {self.path}")
+        return self.path
+
+    def abort(self):
+        if self.writer is not None and self.writer.is_open:
+            try:
+                self.writer.close()  # otherwise its finalizer writes to the closed sink
+            except (OSError, ValueError):
+                pass
+        if self.sink is not None and not self.sink.closed:
+            self.sink.close()
+        if self.tmp and os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+def write_curated(df, curated_dir, module, name, module_cfg, parsed=None):
+    w = CuratedWriter(curated_dir, module, name, module_cfg)
+    w.write(df, parsed)
+    path, digest = w.close()
+    w.commit()
+    return path, digest
+
+def read_curated(curated_dir, module, columns=None, filters=None):
+    """One module's curated history as a DataFrame, with column projection and pyarrow filters pushed down."""
+    path = os.path.join(curated_dir, f'module={module}')
+    table = pq.read_table(path, columns=columns, filters=filters or None, partitioning='hive')
+    return table.to_pandas()
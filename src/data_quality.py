@@ -1,8 +1,148 @@
-import pandas as pd, logging
-
-def profile_data(file_path):
-    df = pd.read_csv(file_path)
-    nulls = int(df.isna().sum().sum())
-    completeness = 100 - (nulls / (len(df) * len(df.columns))) * 100
-    logging.info(f"{file_path}: {len(df)} rows, completeness {completeness:.2f}%")
-    return completeness
+import pandas as pd, numpy as np, logging, os, datetime
+from src.metrics import get_sink
+from src.validate_schema import column_types, parse_values
+from src.csv_io import read_frame, read_chunks
+
+HLL_P = 12
+HLL_M = 1 << HLL_P
+_HLL_ALPHA = 0.7213 / (1 + 1.079 / HLL_M)
+
+# -------- HyperLogLog --------
+def _bit_length(v):
+    """Exact bit length of uint64 values, via two float-exact 32-bit halves."""
+    hi, lo = (v >> np.uint64(32)).astype(np.float64), (v & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        bl_hi, bl_lo = np.floor(np.log2(hi)) + 33, np.floor(np.log2(lo)) + 1
+    return np.where(hi > 0, bl_hi, np.where(lo > 0, bl_lo, 0)).astype(np.int64)
+
+def hll_registers(values):
+    regs = np.zeros(HLL_M, dtype=np.uint8)
+    if len(values):
+        h = pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy(dtype=np.uint64)
+        idx = (h >> np.uint64(64 - HLL_P)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - HLL_P)) - 1)
+        rank = (64 - HLL_P) - _bit_length(rest) + 1
+        np.maximum.at(regs, idx, rank.astype(np.uint8))
+    return regs
+
+def hll_estimate(regs):
+    est = _HLL_ALPHA * HLL_M * HLL_M / np.sum(np.power(2.0, -regs.astype(np.float64)))
+    zeros = int(np.count_nonzero(regs == 0))
+    if est <= 2.5 * HLL_M and zeros:
+        est = HLL_M * np.log(HLL_M / zeros)  # linear counting for small cardinalities
+    return int(round(est))
+
+# -------- partial profiles --------
+def _scalar(v):
+    if v is None or pd.isna(v):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.isoformat()
+    return v.item() if hasattr(v, 'item') else v
+
+def _column_profile(series, kind, typed=None):
+    present = series.dropna()
+    if isinstance(present.dtype, pd.CategoricalDtype):
+        present = present.astype(present.cat.categories.dtype)  # unordered categoricals have no min/max
+    valid = (parse_values(present, kind) if typed is None else typed).dropna()
+    lo, hi = (_scalar(valid.min()), _scalar(valid.max())) if len(valid) else (None, None)
+    if kind == 'int' and lo is not None:
+        lo, hi = int(lo), int(hi)
+    return {
+        'nulls': int(len(series) - len(present)),
+        'nonconforming': int(len(present) - len(valid)),
+        'min': lo,
+        'max': hi,
+        'hll': hll_registers(present),
+    }
+
+def partial_profile(df, module_cfg=None, parsed=None):
+    """Profile one frame or chunk; `parsed` reuses columns Schema.check_values already parsed."""
+    types, parsed = column_types(module_cfg), parsed or {}
+    cols = {c: _column_profile(df[c], types.get(c, 'string'), parsed.get(c)) for c in df.columns}
+    return {'rows': len(df), 'cells': int(df.size),
+            'nulls': sum(c['nulls'] for c in cols.values()), 'columns': cols}
+
+def _pick(fn, a, b):
+    if a is None or b is None:
+        return b if a is None else a
+    return fn(a, b)
+
+def merge_profiles(a, b):
+    if not a:
+        return b
+    cols = dict(a['columns'])
+    for name, cb in b['columns'].items():
+        ca = cols.get(name)
+        cols[name] = cb if ca is None else {
+            'nulls': ca['nulls'] + cb['nulls'],
+            'nonconforming': ca['nonconforming'] + cb['nonconforming'],
+            'min': _pick(min, ca['min'], cb['min']),
+            'max': _pick(max, ca['max'], cb['max']),
+            'hll': np.maximum(ca['hll'], cb['hll']),
+        }
+    return {'rows': a['rows'] + b['rows'], 'cells': a['cells'] + b['cells'],
+            'nulls': a['nulls'] + b['nulls'], 'columns': cols}
+
+def summarize(profile):
+    """Plain-dict view of a profile (no sketches), for logging, thresholds and storage."""
+    rows, cells = profile['rows'], profile['cells']
+    return {
+        'rows': rows,
+        'completeness': 100 - (profile['nulls'] / cells) * 100 if cells else 100.0,
+        'columns': {name: {
+            'null_rate': c['nulls'] / rows if rows else 0.0,
+            'distinct_est': hll_estimate(c['hll']),
+            'min': c['min'], 'max': c['max'],
+            'nonconforming': c['nonconforming'],
+            'nonconforming_rate': c['nonconforming'] / (rows - c['nulls']) if rows > c['nulls'] else 0.0,
+        } for name, c in profile['columns'].items()},
+    }
+
+def check_thresholds(summary, module_cfg, label):
+    q = (module_cfg or {}).get('quality') or {}
+    problems = []
+    if 'min_completeness' in q and summary['completeness'] < q['min_completeness']:
+        problems.append(f"completeness {summary['completeness']:.2f}% < {q['min_completeness']}%")
+    for col, limit in (q.get('max_null_rate') or {}).items():
+        rate = summary['columns'].get(col, {}).get('null_rate', 0.0)
+        if rate > limit:
+            problems.append(f"{col} null rate {rate:.4f} > {limit}")
+    if problems:
+        raise ValueError(f"{label} failed data-quality thresholds: {'; '.join(problems)}")
+
+def log_profile(profile, label):
+    summary = summarize(profile)
+    logging.info(f"{label}: {summary['rows']} rows, completeness {summary['completeness']:.2f}%")
+    for name, c in summary['columns'].items():
+        logging.debug(f"{label}: {name} null_rate={c['null_rate']:.4f} distinct~{c['distinct_est']} "
+                      f"min={c['min']} max={c['max']} nonconforming={c['nonconforming']}")
+    return summary
+
+def profile_frame(df, label, module_cfg=None):
+    return log_profile(partial_profile(df, module_cfg), label)['completeness']
+
+def profile_data(file_path, chunksize=None, module_cfg=None):
+    types = column_types(module_cfg)
+    if not chunksize:
+        return profile_frame(read_frame(file_path, types), file_path, module_cfg)
+    profile = {}
+    for chunk in read_chunks(file_path, types, chunksize):
+        profile = merge_profiles(profile, partial_profile(chunk, module_cfg))
+    return log_profile(profile, file_path)['completeness']
+
+# -------- persistence --------
+def save_profile(db_path, module, source, summary):
+    """Queue one row per column (plus '*' for the file) in the runtime stats DB for trending."""
+    sink = get_sink(db_path)
+    now = datetime.datetime.now()
+    base = {'date': now.date().isoformat(), 'timestamp': now.isoformat(), 'module': module,
+            'source': os.path.basename(source), 'row_count': summary['rows']}
+    sink.record('dq_profile', dict(base, column_name='*', null_rate=None, distinct_est=None, min_value=None,
+                                   max_value=None, nonconforming=None, completeness=summary['completeness']))
+    for name, c in summary['columns'].items():
+        sink.record('dq_profile', dict(base, column_name=name, null_rate=c['null_rate'],
+                                       distinct_est=c['distinct_est'],
+                                       min_value=None if c['min'] is None else str(c['min']),
+                                       max_value=None if c['max'] is None else str(c['max']),
+                                       nonconforming=c['nonconforming'], completeness=None))
@@ -0,0 +1,50 @@
+import os, shutil, logging
+
+try:
+    import fcntl
+    FICLONE = 0x40049409  # Linux ioctl: share extents between two files
+except ImportError:  # Windows
+    fcntl = None
+
+def same_filesystem(a, b):
+    return os.stat(a).st_dev == os.stat(b).st_dev
+
+def reflink(src, dst):
+    if fcntl is None:
+        raise OSError('reflink not supported on this platform')
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def clone_file(src, dst, hardlink=True):
+    """Return how dst was created: 'link', 'reflink' or 'copy'."""
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError:
+            pass
+    try:
+        reflink(src, dst)
+        return 'reflink'
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+def move_file(src, dst):
+    """Atomically place src at dst; returns 'rename' or 'copy'."""
+    if same_filesystem(src, os.path.dirname(dst) or '.'):
+        os.replace(src, dst)
+        return 'rename'
+    tmp = os.path.join(os.path.dirname(dst), f'.{os.path.basename(dst)}.inprogress')
+    clone_file(src, tmp, hardlink=False)
+    os.replace(tmp, dst)
+    os.remove(src)
+    logging.debug(f"{src} and {dst} are on different filesystems; copied")
+    return 'copy'
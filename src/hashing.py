@@ -0,0 +1,77 @@
+import hashlib, mmap, os, threading, json
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULTS = {'algorithm': 'md5', 'buffer_mb': 4}  # the digest every manifest row so far was written with
+_settings = dict(DEFAULTS)
+_cache, _cache_lock = {}, threading.Lock()
+
+def configure(cfg):
+    """Pick up settings.hash_algorithm / settings.hash_buffer_mb."""
+    settings = cfg.get('settings', {})
+    algorithm = settings.get('hash_algorithm', DEFAULTS['algorithm'])
+    hashlib.new(algorithm)  # fail fast on a typo
+    _settings.update(algorithm=algorithm, buffer_mb=settings.get('hash_buffer_mb', DEFAULTS['buffer_mb']))
+
+def new_hasher(algorithm=None):
+    return hashlib.new(algorithm or _settings['algorithm'])
+
+def _digest(path, algorithm, buffer_size, use_mmap):
+    h = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap and size > buffer_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+            return h.hexdigest()
+        buf = bytearray(buffer_size)
+        view = memoryview(buf)
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+def stat_key(path, algorithm=None):
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm or _settings['algorithm'])
+
+def hash_file(path, algorithm=None, buffer_size=None, use_mmap=True, cache=True):
+    algorithm = algorithm or _settings['algorithm']
+    buffer_size = buffer_size or _settings['buffer_mb'] * 1024 * 1024
+    key = stat_key(path, algorithm)
+    if cache and key in _cache:
+        return _cache[key]
+    digest = _digest(path, algorithm, buffer_size, use_mmap)
+    if cache:
+        with _cache_lock:
+            _cache[key] = digest
+    return digest
+
+def hash_files(paths, workers=None, **kwargs):
+    """Hash many files concurrently; returns {path: digest}."""
+    paths = list(paths)
+    if len(paths) <= 1:
+        return {p: hash_file(p, **kwargs) for p in paths}
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) + 4)) as pool:
+        return dict(zip(paths, pool.map(lambda p: hash_file(p, **kwargs), paths)))
+
+def load_digest_cache(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        entries = json.load(f)
+    with _cache_lock:
+        for *key, digest in entries:
+            _cache[tuple(key)] = digest
+    return len(entries)
+
+def save_digest_cache(path, keys):
+    """Persist the digests for `keys` (stat_key tuples) atomically."""
+    entries = [[*k, _cache[k]] for k in keys if k in _cache]
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(entries, f)
+    os.replace(tmp, path)
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
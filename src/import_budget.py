@@ -0,0 +1,66 @@
+import os, sys, re, json, time, argparse, subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'requests', 'yaml']
+CHECKS = [
+    {'name': 'manage.py --help', 'args': ['manage.py', '--help'], 'budget_ms': 150, 'forbid': HEAVY},
+    {'name': 'manage.py run --help', 'args': ['manage.py', 'run', '--help'], 'budget_ms': 150, 'forbid': HEAVY},
+    {'name': 'manage.py purge --help', 'args': ['manage.py', 'purge', '--help'], 'budget_ms': 150, 'forbid': HEAVY},
+    {'name': 'cron runtime logger', 'args': ['-c', 'import src.log_runtime_sqlite'], 'budget_ms': 100,
+     'forbid': HEAVY},
+    {'name': 'dashboard', 'args': ['-c', 'import src.app_dashboard'], 'budget_ms': 500,
+     'forbid': ['pandas', 'numpy', 'pyarrow']},
+]
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def parse_importtime(stderr):
+    """({module: cumulative µs}, total µs of top-level imports after interpreter startup) from -X importtime output."""
+    modules, total = {}, 0
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        modules[name] = cumulative
+        if depth == 1:
+            total = 0 if name == 'site' else total + cumulative  # site (and any .pth hooks) closes startup
+    return modules, total
+
+def run_check(check, scale=1.0):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', *check['args']], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules, total = parse_importtime(proc.stderr)
+    import_ms = total / 1000
+    budget = check['budget_ms'] * scale
+    problems = [f"imports {name}" for name in check.get('forbid', []) if name in modules]
+    if import_ms > budget:
+        problems.append(f"imports take {import_ms:.0f} ms, budget {budget:.0f} ms")
+    if proc.returncode:
+        problems.append(f"exit status {proc.returncode}: {proc.stderr.strip().splitlines()[-1:]}")
+    slowest = sorted(((v, k) for k, v in modules.items() if '.' not in k), reverse=True)[:5]
+    return {'name': check['name'], 'import_ms': round(import_ms, 1), 'wall_ms': round(wall_ms, 1),
+            'budget_ms': round(budget), 'ok': not problems, 'problems': problems,
+            'slowest': {k: round(v / 1000, 1) for v, k in slowest}}
+
+def main(scale=1.0, as_json=False):
+    results = [run_check(c, scale) for c in CHECKS]
+    if as_json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"{'ok  ' if r['ok'] else 'FAIL'} {r['name']}: {r['import_ms']} ms imports, "
+                  f"{r['wall_ms']} ms wall (budget {r['budget_ms']} ms)")
+            for p in r['problems']:
+                print(f"     {p}")
+            if not r['ok']:
+                print(f"     slowest: {', '.join(f'{k} {v} ms' for k, v in r['slowest'].items())}")
+    return 0 if all(r['ok'] for r in results) else 1
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget (slower machines).')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    sys.exit(main(args.scale, args.json))
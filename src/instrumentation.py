@@ -0,0 +1,115 @@
+import time, contextlib, os, datetime, logging, tracemalloc
+
+def io_counters():
+    """(bytes read, bytes written) by this process so far, including page-cache hits."""
+    counters = {}
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                counters[key] = int(value)
+    except OSError:
+        return None, None
+    return counters.get('rchar'), counters.get('wchar')
+
+def reset_peak_rss():
+    """Restart the kernel's RSS high-water mark (VmHWM); False where /proc/self/clear_refs is unavailable."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """VmHWM in MB: the peak RSS since the last reset_peak_rss(), or None off Linux."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def stage_peak():
+    """Start measuring one stage's memory peak; returns a function that reads it in MB."""
+    if reset_peak_rss():
+        return peak_rss_mb
+    started = not tracemalloc.is_tracing()  # no VmHWM reset: Python-level allocations only
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    def read():
+        peak = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+        return round(peak / 1024 / 1024, 1)
+    return read
+
+def _rows(ctx):
+    if ctx.get('df') is not None:
+        return len(ctx['df'])
+    return (ctx.get('profile') or {}).get('rows')
+
+def _delta(after, before):
+    return None if after is None or before is None else after - before
+
+@contextlib.contextmanager
+def timed(ctx, stage):
+    """Time one stage; the entry is recorded even if the stage raises."""
+    read0, written0 = io_counters()
+    peak = stage_peak()
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        read1, written1 = io_counters()
+        ctx.setdefault('timings', []).append({
+            'stage': stage,
+            'wall_sec': round(time.perf_counter() - wall0, 4),
+            'cpu_sec': round(time.process_time() - cpu0, 4),
+            'bytes_in': _delta(read1, read0),
+            'bytes_out': _delta(written1, written0),
+            'rows': _rows(ctx),
+            'peak_rss_mb': peak(),
+        })
+
+def log_timings(source, timings):
+    for t in timings:
+        logging.debug(f"{source}: {t['stage']} wall={t['wall_sec']}s cpu={t['cpu_sec']}s rows={t['rows']} "
+                      f"in={t['bytes_in']} out={t['bytes_out']} rss={t['peak_rss_mb']}MB")
+
+@contextlib.contextmanager
+def profiled(mode, out_dir, top=30):
+    """Profile the enclosed block; yields the path of the report it will write."""
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    if mode == 'memory':
+        import tracemalloc
+        path = os.path.join(out_dir, f'run_{stamp}.tracemalloc.txt')
+        tracemalloc.start(25)
+        try:
+            yield path
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w') as f:
+                f.write(f"current {current / 1024 / 1024:.1f} MB, peak {peak / 1024 / 1024:.1f} MB\n\n")
+                for stat in snapshot.statistics('lineno')[:top]:
+                    f.write(f"{stat}\n")
+            logging.info(f"tracemalloc report written to {path}")
+        return
+    import cProfile, pstats
+    path = os.path.join(out_dir, f'run_{stamp}.prof')
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        with open(f'{path}.txt', 'w') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(top)
+        logging.info(f"cProfile stats written to {path} (summary in {path}.txt)")
@@ -0,0 +1,79 @@
+import os, sys, json, time, random, sqlite3, tempfile, threading, argparse, datetime, logging, urllib.request
+from werkzeug.serving import make_server
+from src import app_dashboard
+from src.log_runtime_sqlite import log_runtime_sqlite
+from src.metadata_utils import manifest_db
+
+def seed_history(runtime_db, manifest_path, years, runs_per_day=4):
+    log_runtime_sqlite(runtime_db, 0, 'success')  # creates schema and indexes
+    today = datetime.date.today()
+    rows = []
+    for d in range(years * 365):
+        day = (today - datetime.timedelta(days=d)).isoformat()
+        for _ in range(runs_per_day):
+            sec = random.uniform(60, 600)
+            rows.append((day, 'etl-host', f'{day} 02:00:00', f'{day} 02:10:00', sec, round(sec / 60, 2),
+                         'success' if random.random() > 0.05 else 'failure'))
+    conn = sqlite3.connect(runtime_db)
+    with conn:
+        conn.executemany('INSERT INTO etl_runtime (date, hostname, start_time, end_time, runtime_sec, runtime_min, '
+                         'status) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.close()
+    conn = manifest_db(manifest_path)
+    with conn:
+        conn.executemany('INSERT INTO manifest (filename, hash, timestamp) VALUES (?, ?, ?)',
+                         [(f'IRB_PROTOCOL_{i}.parquet', f'{i:064x}', datetime.datetime.now().isoformat())
+                          for i in range(len(rows))])
+    return len(rows)
+
+def _viewer(url, stop, latencies, errors):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=30) as r:
+                r.read()
+            latencies.append(time.perf_counter() - t0)
+        except Exception:
+            errors.append(1)
+
+def _pct(values, p):
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2) if values else None
+
+def run(viewers, seconds, years, write_every=None):
+    with tempfile.TemporaryDirectory() as root:
+        app_dashboard.RUNTIME_DB = os.path.join(root, 'etl_stats.db')
+        app_dashboard.MANIFEST_PATH = os.path.join(root, 'manifest.db')
+        runs = seed_history(app_dashboard.RUNTIME_DB, app_dashboard.MANIFEST_PATH, years)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, app_dashboard.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+        stop, latencies, errors = threading.Event(), [], []
+        threads = [threading.Thread(target=_viewer, args=(url, stop, latencies, errors)) for _ in range(viewers)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        while time.perf_counter() - t0 < seconds:
+            time.sleep(write_every or seconds)
+            if write_every:
+                log_runtime_sqlite(app_dashboard.RUNTIME_DB, random.uniform(60, 600), 'success')
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        server.shutdown()
+    latencies.sort()
+    return {'viewers': viewers, 'history_runs': runs, 'seconds': round(elapsed, 2),
+            'requests': len(latencies), 'errors': len(errors),
+            'req_per_s': round(len(latencies) / elapsed, 1),
+            'p50_ms': _pct(latencies, 0.50), 'p95_ms': _pct(latencies, 0.95), 'p99_ms': _pct(latencies, 0.99)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--viewers', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--write-every', type=float, default=None)
+    args = parser.parse_args()
+    json.dump(run(args.viewers, args.seconds, args.years, args.write_every), sys.stdout, indent=2)
+    print()
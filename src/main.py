@@ -1,39 +1,32 @@
-import yaml, glob, logging, os
-from src.validate_schema import validate_schema
-from src.transform_clean import clean_data
-from src.load_curated import promote_to_curated
-from src.metadata_utils import update_manifest
-from src.data_quality import profile_data
-from src.notify_email import send_notification
-from src.notify_slack import send_slack_alert
-from src.retention_cleanup import purge_old_files, archive_curated_data
+import logging
+from src.scheduler import run_modules, raise_for_failures
+from src.notifier import Dispatcher
+from src.retention_cleanup import apply_retention, archive_curated_data
+from src.config import load_settings
 
-def run_module(module, cfg):
+MODULES = ['irb', 'grants']
+
+def run_module(module, cfg, jobs=None):
     logging.info(f"Running module {module}")
-    module_cfg = yaml.safe_load(open(f'config/modules/{module}.yaml'))
-    for f in glob.glob('data/incoming/*.csv'):
-        if module.upper() in os.path.basename(f).upper():
-            df = validate_schema(f, module_cfg)
-            staged = clean_data(f, cfg['paths']['staging'])
-            curated = promote_to_curated(staged, cfg['paths']['curated'])
-            profile_data(curated)
-            update_manifest(curated, cfg['paths']['manifest'])
+    return run_modules([module], cfg, jobs)
 
 if __name__ == '__main__':
     logging.basicConfig(filename='./logs/etl.log', level=logging.INFO)
-    cfg = yaml.safe_load(open('./config/settings.yaml'))
+    cfg = load_settings()
+    # Notifications are delivered in the background and coalesced into digests
+    notifier = Dispatcher(cfg)
     try:
-        for m in ['irb','grants']:
-            run_module(m, cfg)
+        report = run_modules(MODULES, cfg)
+        for f in report['failed']:
+            notifier.notify(f"ETL file failed: {f['source']}", f"{f['module']}: {f['error']}", "FAILURE")
+        raise_for_failures(report)
         # Archive + Retention Cleanup
         archive_curated_data(cfg['paths']['curated'], cfg['paths']['archive'])
-        purge_old_files(cfg['paths']['raw'], cfg['settings']['retention_days'])
-        # Notifications
-        send_notification(cfg, "ETL Success", "IRB + Grants modules completed successfully.")
-        send_slack_alert(cfg['alerts']['slack_webhook'], "BU ETL Pipeline", "SUCCESS", "All modules completed successfully.")
+        apply_retention(cfg)
+        notifier.notify("ETL Success", "IRB + Grants modules completed successfully.", "SUCCESS")
         print("✅ ETL pipeline completed successfully.")
     except Exception as e:
-        msg = f"ETL Failed: {str(e)}"
-        send_notification(cfg, "ETL Failure", msg)
-        send_slack_alert(cfg['alerts']['slack_webhook'], "BU ETL Pipeline", "FAILURE", msg)
+        notifier.notify("ETL Failure", f"ETL Failed: {str(e)}", "FAILURE")
         raise
+    finally:
+        notifier.close()
@@ -1,21 +1,133 @@
-import json, os, datetime, hashlib, logging
+import json, os, datetime, logging, sqlite3, threading
+from src import hashing
 
 def file_hash(path):
-    h = hashlib.md5()
-    with open(path, 'rb') as f:
-        while chunk := f.read(8192): h.update(chunk)
-    return h.hexdigest()
+    return hashing.hash_file(path)
 
-def update_manifest(file_path, manifest_path):
+class HashingWriter:
+    """File writer that hashes every byte written (text by default, binary=True for bytes)."""
+    def __init__(self, path, encoding='utf-8', binary=False):
+        self.h = hashing.new_hasher()
+        self.encoding = None if binary else encoding
+        self.f = open(path, 'wb') if binary else open(path, 'w', encoding=encoding, newline='')
+
+    def write(self, s):
+        self.h.update(s if self.encoding is None else s.encode(self.encoding))
+        return self.f.write(s)
+
+    def hexdigest(self):
+        return self.h.hexdigest()
+
+    def tell(self):
+        return self.f.tell()
+
+    def flush(self):
+        self.f.flush()
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return False
+
+    def seekable(self):
+        return False
+
+    @property
+    def closed(self):
+        return self.f.closed
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# -------- MANIFEST --------
+# The manifest is an append-only SQLite table (WAL mode) indexed by filename,
+# hash and timestamp. Each entry is a single-row INSERT in its own transaction,
+# so appends are O(1) and a crash can never leave a half-written manifest.
+# A legacy manifest.json is imported once, the first time the database is opened.
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_manifest_filename ON manifest (filename);
+CREATE INDEX IF NOT EXISTS idx_manifest_hash ON manifest (hash);
+CREATE INDEX IF NOT EXISTS idx_manifest_timestamp ON manifest (timestamp);
+"""
+
+_manifest_conns = {}
+
+def manifest_db_path(manifest_path):
+    """Settings written before the SQLite backend point at manifest.json; use the .db next to it."""
+    root, ext = os.path.splitext(manifest_path)
+    return root + '.db' if ext == '.json' else manifest_path
+
+def migrate_json_manifest(conn, json_path):
+    """Import a legacy manifest.json once, marked done by PRAGMA user_version in the same transaction.
+    A missing or unreadable file leaves user_version at 0, so the import is tried again on the next open."""
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= 1 or not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path) as f:
+            entries = json.load(f)
+        with conn:
+            conn.executemany('INSERT INTO manifest (filename, hash, timestamp) VALUES (?, ?, ?)',
+                             [(e['filename'], e['hash'], e['timestamp']) for e in entries])
+            conn.execute('PRAGMA user_version = 1')
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"Could not migrate legacy manifest {json_path}: {e!r}; will retry on next open")
+        return 0
+    logging.info(f"Migrated {len(entries)} manifest entries from {json_path}")
+    return len(entries)
+
+def manifest_db(manifest_path):
+    """Open (once per process and thread) the manifest database, creating and migrating it as needed."""
+    db_path = manifest_db_path(manifest_path)
+    key = (db_path, os.getpid(), threading.get_ident())
+    if key not in _manifest_conns:
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(MANIFEST_SCHEMA)
+        migrate_json_manifest(conn, os.path.splitext(db_path)[0] + '.json')
+        _manifest_conns[key] = conn
+    return _manifest_conns[key]
+
+def update_manifest(file_path, manifest_path, digest=None):
     entry = {
         'filename': os.path.basename(file_path),
-        'hash': file_hash(file_path),
+        'hash': digest or file_hash(file_path),
         'timestamp': datetime.datetime.now().isoformat()
     }
-    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
-    manifest = []
-    if os.path.exists(manifest_path):
-        manifest = json.load(open(manifest_path))
-    manifest.append(entry)
-    json.dump(manifest, open(manifest_path, 'w'), indent=2)
+    conn = manifest_db(manifest_path)
+    with conn:
+        conn.execute('INSERT INTO manifest (filename, hash, timestamp) VALUES (:filename, :hash, :timestamp)', entry)
     logging.info(f"Manifest updated with {file_path}")
+    return entry
+
+def latest_manifest(manifest_path, n=10):
+    """Most recent n entries, oldest first."""
+    rows = manifest_db(manifest_path).execute(
+        'SELECT filename, hash, timestamp FROM manifest ORDER BY id DESC LIMIT ?', (n,)).fetchall()
+    return [dict(r) for r in reversed(rows)]
+
+def lookup_by_hash(manifest_path, digest):
+    rows = manifest_db(manifest_path).execute(
+        'SELECT filename, hash, timestamp FROM manifest WHERE hash = ? ORDER BY id', (digest,)).fetchall()
+    return [dict(r) for r in rows]
+
+def lookup_by_filename(manifest_path, filename):
+    rows = manifest_db(manifest_path).execute(
+        'SELECT filename, hash, timestamp FROM manifest WHERE filename = ? ORDER BY id', (filename,)).fetchall()
+    return [dict(r) for r in rows]
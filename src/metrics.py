@@ -0,0 +1,273 @@
+import sqlite3, os, datetime, socket, threading, time, atexit, logging
+
+# Rollups (see src/rollups.py): one etl_rollup row per (grain, scope, period).
+# grain is 'day' or 'week' (period is then the Monday); scope is 'run' for
+# etl_runtime rows or the module name for etl_file_timing rows. Durations are
+# also counted in log-scale buckets (each 10% wider, from 10 ms) so p50/p95
+# can be read back without the raw rows. Triggers apply every insert, whoever
+# the writer is.
+ROLLUP_SOURCES = [
+    # (table, scope, duration column, rows processed)
+    ('etl_runtime', "'run'", 'runtime_sec', '0'),
+    ('etl_file_timing', 'module', 'wall_sec', 'COALESCE(rows, 0)'),
+]
+
+def _week(date):
+    return f"date({date}, 'weekday 0', '-6 days')"
+
+def _bucket(value):
+    return (f"COALESCE((SELECT bucket FROM etl_rollup_bucket WHERE upper_sec >= {value} ORDER BY upper_sec LIMIT 1), "
+            f"(SELECT max(bucket) FROM etl_rollup_bucket))")
+
+def _new(expr):
+    """Column references in a ROLLUP_SOURCES expression, as seen by a trigger."""
+    for col in ('module', 'rows'):
+        expr = expr.replace(col, f'NEW.{col}')
+    return expr
+
+def _rollup_trigger(table, scope, duration, rows):
+    periods = f"SELECT 'day' AS grain, NEW.date AS period UNION ALL SELECT 'week', {_week('NEW.date')}"
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup AFTER INSERT ON {table} WHEN NEW.date IS NOT NULL BEGIN
+        INSERT INTO etl_rollup (grain, period, scope, runs, successes, total_sec, timed, max_sec, rows)
+            SELECT grain, period, {_new(scope)}, 1, NEW.status = 'success', COALESCE(NEW.{duration}, 0),
+                   NEW.{duration} IS NOT NULL, NEW.{duration}, {_new(rows)}
+            FROM ({periods}) WHERE true
+            ON CONFLICT (grain, scope, period) DO UPDATE SET
+                runs = runs + 1, successes = successes + excluded.successes,
+                total_sec = total_sec + excluded.total_sec, timed = timed + excluded.timed,
+                max_sec = COALESCE(max(max_sec, excluded.max_sec), max_sec, excluded.max_sec),
+                rows = rows + excluded.rows;
+        INSERT INTO etl_rollup_hist (grain, period, scope, bucket, n)
+            SELECT grain, period, {_new(scope)}, {_bucket(f'NEW.{duration}')}, 1
+            FROM ({periods}) WHERE NEW.{duration} IS NOT NULL
+            ON CONFLICT (grain, scope, period, bucket) DO UPDATE SET n = n + 1;
+    END;
+"""
+
+def _rollup_backfill(table, scope, duration, rows):
+    out = ''
+    for grain, period in (('day', 'date'), ('week', _week('date'))):
+        out += f"""
+    INSERT INTO etl_rollup (grain, period, scope, runs, successes, total_sec, timed, max_sec, rows)
+        SELECT '{grain}', {period}, {scope}, count(*), COALESCE(sum(status = 'success'), 0),
+               COALESCE(sum({duration}), 0), count({duration}), max({duration}), sum({rows})
+        FROM {table} WHERE date IS NOT NULL GROUP BY 2, 3;
+    INSERT INTO etl_rollup_hist (grain, period, scope, bucket, n)
+        SELECT '{grain}', period, scope, bucket, count(*) FROM (
+            SELECT {period} AS period, {scope} AS scope, {_bucket(duration)} AS bucket
+            FROM {table} WHERE date IS NOT NULL AND {duration} IS NOT NULL)
+        GROUP BY 2, 3, 4;
+"""
+    return out
+
+ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS etl_rollup (
+        grain TEXT NOT NULL,
+        period TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        runs INTEGER NOT NULL DEFAULT 0,
+        successes INTEGER NOT NULL DEFAULT 0,
+        total_sec REAL NOT NULL DEFAULT 0,
+        timed INTEGER NOT NULL DEFAULT 0,
+        max_sec REAL,
+        rows INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, scope, period)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS etl_rollup_hist (
+        grain TEXT NOT NULL,
+        period TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (grain, scope, period, bucket)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS etl_rollup_bucket (bucket INTEGER PRIMARY KEY, upper_sec REAL NOT NULL);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_etl_rollup_bucket_upper ON etl_rollup_bucket (upper_sec);
+    INSERT OR IGNORE INTO etl_rollup_bucket (bucket, upper_sec)
+        WITH RECURSIVE b(k, u) AS (SELECT 0, 0.01 UNION ALL SELECT k + 1, u * 1.1 FROM b WHERE k < 180)
+        SELECT k, u FROM b;
+""" + ''.join(_rollup_trigger(*source) for source in ROLLUP_SOURCES)
+
+# Rebuilds every rollup from the raw tables; run by migration 4 and rollups.backfill().
+ROLLUP_BACKFILL = """
+    DELETE FROM etl_rollup;
+    DELETE FROM etl_rollup_hist;
+""" + ''.join(_rollup_backfill(*source) for source in ROLLUP_SOURCES)
+
+MIGRATIONS = [
+    # 1: run totals (previously created by log_runtime_sqlite) + indexes
+    """
+    CREATE TABLE IF NOT EXISTS etl_runtime (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        hostname TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        runtime_sec REAL,
+        runtime_min REAL,
+        status TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_etl_runtime_date ON etl_runtime (date);
+    CREATE INDEX IF NOT EXISTS idx_etl_runtime_status ON etl_runtime (status);
+    """,
+    # 2: data-quality profiles (previously created by data_quality.save_profile)
+    """
+    CREATE TABLE IF NOT EXISTS dq_profile (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        timestamp TEXT,
+        module TEXT,
+        source TEXT,
+        column_name TEXT,
+        row_count INTEGER,
+        null_rate REAL,
+        distinct_est INTEGER,
+        min_value TEXT,
+        max_value TEXT,
+        nonconforming INTEGER,
+        completeness REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_dq_profile_module_date ON dq_profile (module, date);
+    """,
+    # 3: per-file and per-stage timings
+    """
+    CREATE TABLE IF NOT EXISTS etl_file_timing (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        timestamp TEXT,
+        hostname TEXT,
+        module TEXT,
+        source TEXT,
+        status TEXT,
+        wall_sec REAL,
+        rows INTEGER,
+        bytes_in INTEGER,
+        bytes_out INTEGER,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_etl_file_timing_date ON etl_file_timing (date);
+    CREATE INDEX IF NOT EXISTS idx_etl_file_timing_module_date ON etl_file_timing (module, date);
+    CREATE TABLE IF NOT EXISTS etl_stage_timing (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        timestamp TEXT,
+        module TEXT,
+        source TEXT,
+        stage TEXT,
+        wall_sec REAL,
+        cpu_sec REAL,
+        bytes_in INTEGER,
+        bytes_out INTEGER,
+        rows INTEGER,
+        peak_rss_mb REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_etl_stage_timing_date ON etl_stage_timing (date);
+    CREATE INDEX IF NOT EXISTS idx_etl_stage_timing_stage ON etl_stage_timing (stage, date);
+    """,
+    # 4: daily/weekly rollups kept current by triggers, backfilled from existing history
+    ROLLUP_SCHEMA + ROLLUP_BACKFILL,
+]
+
+RUN_FIELDS = ['date', 'hostname', 'start_time', 'end_time', 'runtime_sec', 'runtime_min', 'status']
+
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for i, script in enumerate(MIGRATIONS[version:], start=version):
+        with conn:
+            conn.executescript(script)
+            conn.execute(f'PRAGMA user_version = {i + 1}')
+        logging.debug(f"metrics schema migrated to version {i + 1}")
+    return len(MIGRATIONS)
+
+class MetricsSink:
+    def __init__(self, db_path, csv_dir=None, batch_size=200, flush_interval=5.0):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path, self.csv_dir = db_path, csv_dir
+        self.batch_size, self.flush_interval = batch_size, flush_interval
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')  # readers (dashboard) never block the writer
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        migrate(self.conn)
+        self.lock = threading.Lock()
+        self.pending = {}  # table -> (columns, [rows])
+        self.queued = 0
+        self.last_flush = time.monotonic()
+
+    def record(self, table, row):
+        columns = tuple(row)
+        with self.lock:
+            cols, rows = self.pending.setdefault((table, columns), (columns, []))
+            rows.append(tuple(row[c] for c in cols))
+            self.queued += 1
+            due = self.queued >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending, self.queued = self.pending, {}, 0
+            self.last_flush = time.monotonic()
+            if not pending:
+                return
+            with self.conn:
+                for (table, _), (cols, rows) in pending.items():
+                    self.conn.executemany(f"INSERT INTO {table} ({', '.join(cols)}) "
+                                          f"VALUES ({', '.join('?' * len(cols))})", rows)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # -------- typed helpers --------
+    def record_run(self, runtime_sec, status, start_time=None, end_time=None):
+        row = {
+            'date': datetime.date.today().isoformat(),
+            'hostname': socket.gethostname(),
+            'start_time': start_time,
+            'end_time': end_time,
+            'runtime_sec': runtime_sec,
+            'runtime_min': round(runtime_sec / 60, 2),
+            'status': status,
+        }
+        self.record('etl_runtime', row)
+        if self.csv_dir:
+            from src.log_runtime_stats import log_runtime_csv
+            log_runtime_csv(self.csv_dir, runtime_sec, status, start_time, end_time)
+        return row
+
+    def record_file(self, module, source, status, wall_sec=None, rows=None, bytes_in=None, bytes_out=None, error=None):
+        now = datetime.datetime.now()
+        self.record('etl_file_timing', {
+            'date': now.date().isoformat(), 'timestamp': now.isoformat(), 'hostname': socket.gethostname(),
+            'module': module, 'source': os.path.basename(source), 'status': status, 'wall_sec': wall_sec,
+            'rows': rows, 'bytes_in': bytes_in, 'bytes_out': bytes_out, 'error': error})
+
+    def record_stage(self, module, source, stage, wall_sec, cpu_sec=None, bytes_in=None, bytes_out=None,
+                     rows=None, peak_rss_mb=None):
+        now = datetime.datetime.now()
+        self.record('etl_stage_timing', {
+            'date': now.date().isoformat(), 'timestamp': now.isoformat(), 'module': module,
+            'source': os.path.basename(source), 'stage': stage, 'wall_sec': wall_sec, 'cpu_sec': cpu_sec,
+            'bytes_in': bytes_in, 'bytes_out': bytes_out, 'rows': rows, 'peak_rss_mb': peak_rss_mb})
+
+_sinks, _sinks_lock = {}, threading.Lock()
+
+def get_sink(db_path, csv_dir=None):
+    """Shared sink for db_path in this process (a forked child gets its own)."""
+    key = (os.path.abspath(db_path), os.getpid())
+    with _sinks_lock:
+        if key not in _sinks:
+            _sinks[key] = MetricsSink(db_path, csv_dir)
+        elif csv_dir:
+            _sinks[key].csv_dir = csv_dir
+        return _sinks[key]
+
+@atexit.register
+def flush_all():
+    for (_, pid), sink in list(_sinks.items()):
+        if pid == os.getpid():
+            try:
+                sink.flush()
+            except sqlite3.Error as e:
+                logging.error(f"metrics flush to {sink.db_path} failed: {e}")
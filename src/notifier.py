@@ -0,0 +1,102 @@
+import threading, queue, random, time, logging
+
+DEFAULTS = {'timeout_sec': 10, 'retries': 3, 'backoff_sec': 1, 'max_backoff_sec': 30,
+            'digest_window_sec': 5, 'queue_size': 1000, 'shutdown_timeout_sec': 60}
+_STOP = object()
+
+def retry(fn, retries=3, backoff=1.0, max_backoff=30.0, label='call'):
+    """Call fn(), retrying up to `retries` more times with full-jitter exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+            logging.warning(f"{label} failed ({e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+def digest(messages):
+    """Collapse queued (subject, body, status) messages into one."""
+    if len(messages) == 1:
+        return messages[0]
+    status = 'FAILURE' if any(m[2] == 'FAILURE' for m in messages) else messages[-1][2]
+    failures = sum(m[2] == 'FAILURE' for m in messages)
+    subject = f"ETL digest: {len(messages)} notifications, {failures} failure(s)"
+    body = '\n'.join(f"- [{m[2]}] {m[0]}: {m[1]}" for m in messages)
+    return subject, body, status
+
+def default_channels(cfg, timeout):
+    from src import notify_email, notify_slack  # smtplib/email and requests only when a Dispatcher is built
+    channels = {}
+    if cfg.get('email'):
+        channels['email'] = lambda subject, body, status: notify_email.deliver(cfg, subject, body, timeout)
+    webhook = (cfg.get('alerts') or {}).get('slack_webhook')
+    if webhook:
+        channels['slack'] = lambda subject, body, status: notify_slack.deliver(webhook, subject, status, body, timeout)
+    return channels
+
+class Dispatcher:
+    def __init__(self, cfg, channels=None):
+        self.settings = DEFAULTS | (cfg.get('notifications') or {})
+        self.channels = channels if channels is not None else default_channels(cfg, self.settings['timeout_sec'])
+        self.queue = queue.Queue(self.settings['queue_size'])
+        self.sent, self.failed, self.dropped = 0, 0, 0
+        self.thread = threading.Thread(target=self._run, name='notifier', daemon=True)
+        self.thread.start()
+
+    def notify(self, subject, body, status='INFO'):
+        """Queue a message without blocking; drops (and logs) it if the queue is full."""
+        try:
+            self.queue.put_nowait((subject, body, status))
+        except queue.Full:
+            self.dropped += 1
+            logging.error(f"Notification queue full, dropped: {subject}")
+
+    def _collect(self, first):
+        batch, deadline = [first], time.monotonic() + self.settings['digest_window_sec']
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            batch, stop = self._collect(item)
+            self._deliver(*digest(batch))
+
+    def _deliver(self, subject, body, status):
+        s = self.settings
+        for name, channel in self.channels.items():
+            try:
+                retry(lambda: channel(subject, body, status), s['retries'], s['backoff_sec'],
+                      s['max_backoff_sec'], label=f"{name} notification")
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"{name} notification failed after {s['retries']} retries: {e}")
+
+    def close(self, timeout=None):
+        """Flush queued messages and stop; returns False if delivery is still running after timeout."""
+        timeout = self.settings['shutdown_timeout_sec'] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(max(0, deadline - time.monotonic()))
+        if self.thread.is_alive():
+            logging.error(f"Notifications still pending after {timeout}s; abandoning them")
+            return False
+        from src import notify_email
+        notify_email.close_connections()
+        return True
@@ -1,16 +1,70 @@
-import smtplib
+import smtplib, threading
 from email.mime.text import MIMEText
 import logging
 
-def send_notification(cfg, subject, body):
+# One SMTP connection per (host, port), reused across messages and
+# re-opened if the server has dropped it.
+_connections, _connections_lock = {}, threading.Lock()
+
+class SMTPConnection:
+    def __init__(self, host, port, timeout=10):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.smtp = None
+        self.lock = threading.Lock()
+
+    def _open(self):
+        self.smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+    def send(self, msg):
+        with self.lock:
+            if self.smtp is None:
+                self._open()
+            try:
+                self.smtp.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.close_locked()
+                self._open()  # idle connection timed out server-side; one fresh attempt
+                self.smtp.send_message(msg)
+
+    def close_locked(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.smtp = None
+
+    def close(self):
+        with self.lock:
+            self.close_locked()
+
+def smtp_connection(cfg, timeout=10):
+    key = (cfg["email"]["smtp_host"], cfg["email"]["smtp_port"])
+    with _connections_lock:
+        if key not in _connections:
+            _connections[key] = SMTPConnection(*key, timeout=timeout)
+        return _connections[key]
+
+def close_connections():
+    with _connections_lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+
+def build_message(cfg, subject, body):
     msg = MIMEText(body)
     msg["Subject"] = subject
     msg["From"] = cfg["email"]["sender"]
     msg["To"] = ", ".join(cfg["email"]["recipients"])
+    return msg
+
+def deliver(cfg, subject, body, timeout=10):
+    """Send over the pooled connection; raises on failure (the dispatcher retries)."""
+    smtp_connection(cfg, timeout).send(build_message(cfg, subject, body))
+    logging.info(f"Email sent: {subject}")
 
+def send_notification(cfg, subject, body, timeout=10):
     try:
-        with smtplib.SMTP(cfg["email"]["smtp_host"], cfg["email"]["smtp_port"]) as s:
-            s.send_message(msg)
-        logging.info(f"Email sent: {subject}")
+        deliver(cfg, subject, body, timeout)
     except Exception as e:
         logging.error(f"Email send failed: {e}")
@@ -1,8 +1,23 @@
-import requests, json, logging
+import requests, logging, threading
+from requests.adapters import HTTPAdapter
 
-def send_slack_alert(webhook_url, title, status, message):
+_session, _session_lock = None, threading.Lock()
+
+def session():
+    """Process-wide Session so webhook posts reuse pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session.headers['Content-Type'] = 'application/json'
+        return _session
+
+def slack_payload(title, status, message):
     color = "#36a64f" if status == "SUCCESS" else "#ff0000"
-    payload = {
+    return {
         "attachments": [{
             "fallback": f"{title}: {status}",
             "color": color,
@@ -10,12 +25,15 @@ def send_slack_alert(webhook_url, title, status, message):
             "text": message
         }]
     }
+
+def deliver(webhook_url, title, status, message, timeout=10):
+    """Post one alert; raises on timeout, connection error or non-2xx (the dispatcher retries)."""
+    resp = session().post(webhook_url, json=slack_payload(title, status, message), timeout=timeout)
+    resp.raise_for_status()
+    logging.info(f"Slack alert sent: {status}")
+
+def send_slack_alert(webhook_url, title, status, message, timeout=10):
     try:
-        resp = requests.post(webhook_url, data=json.dumps(payload),
-                             headers={'Content-Type': 'application/json'})
-        if resp.status_code == 200:
-            logging.info(f"Slack alert sent: {status}")
-        else:
-            logging.error(f"Slack send failed: {resp.text}")
+        deliver(webhook_url, title, status, message, timeout)
     except Exception as e:
-        logging.error(f"Slack error: {e}")
+        logging.error(f"Slack send failed: {e}")
@@ -0,0 +1,134 @@
+import os, logging
+from src.validate_schema import Schema
+from src.transform_clean import clean_frame, write_staged, write_staged_chunks
+from src.csv_io import read_frame, read_chunks, plain_name
+from src.load_curated import promote_to_curated
+from src.curated_store import CuratedWriter, write_curated
+from src.metadata_utils import update_manifest
+from src.data_quality import partial_profile, merge_profiles, log_profile, check_thresholds, save_profile
+from src.instrumentation import timed, log_timings
+from src.metrics import get_sink
+from src.curated_merge import merge_file
+
+def stage_read(ctx):
+    ctx['df'] = read_frame(ctx['source'], ctx['schema'].types)
+
+def stage_validate(ctx):
+    ctx['parsed'] = {}
+    ctx['schema'].validate(ctx['df'], ctx['source'], ctx['parsed'])
+
+def stage_validate_header(ctx):
+    ctx['schema'].check_header_file(ctx['source'])
+
+def stage_clean(ctx):
+    ctx['df'] = clean_frame(ctx['df'])
+
+def stage_write(ctx):
+    ctx['staged'], ctx['digest'] = write_staged(ctx['df'], ctx['cfg']['paths']['staging'],
+                                                os.path.basename(ctx['source']))
+    ctx['profile'] = partial_profile(ctx['df'], ctx['module_cfg'], ctx['parsed'])
+    logging.info(f"Cleaned {ctx['source']} -> {ctx['staged']}")
+
+def curated_format(cfg):
+    return cfg.get('settings', {}).get('curated_format', 'csv')
+
+def _curated_writer(ctx):
+    return CuratedWriter(ctx['cfg']['paths']['curated'], ctx['module'],
+                         plain_name(os.path.basename(ctx['source'])), ctx['module_cfg'])
+
+def stage_stream(ctx):
+    ctx['profile'] = {}
+    schema, totals = ctx['schema'], ctx['schema'].new_totals()
+    writer = ctx['curated_writer'] = _curated_writer(ctx) if curated_format(ctx['cfg']) == 'parquet' else None
+    def on_chunk(df):
+        parsed = {}
+        schema.check_values(df, ctx['source'], totals, parsed)
+        ctx['profile'] = merge_profiles(ctx['profile'], partial_profile(df, ctx['module_cfg'], parsed))
+        if writer:
+            writer.write(df, parsed)
+    chunks = read_chunks(ctx['source'], schema.types, ctx['chunk_rows'])
+    ctx['staged'], ctx['digest'] = write_staged_chunks(chunks, ctx['cfg']['paths']['staging'],
+                                                       os.path.basename(ctx['source']), on_chunk)
+    schema.finish(totals, ctx['source'])
+    if writer:
+        ctx['curated'], ctx['digest'] = writer.close()
+    logging.info(f"Cleaned {ctx['source']} -> {ctx['staged']} in chunks of {ctx['chunk_rows']}")
+
+def stage_promote(ctx):
+    if ctx.get('curated_writer'):
+        ctx['curated_writer'].commit()  # written chunk by chunk in stage_stream
+        return
+    if curated_format(ctx['cfg']) == 'parquet':
+        ctx['curated'], ctx['digest'] = write_curated(ctx['df'], ctx['cfg']['paths']['curated'], ctx['module'],
+                                                      plain_name(os.path.basename(ctx['source'])), ctx['module_cfg'],
+                                                      ctx['parsed'])
+    else:
+        ctx['curated'] = promote_to_curated(ctx['staged'], ctx['cfg']['paths']['curated'])
+
+def stage_profile(ctx):
+    ctx['quality'] = log_profile(ctx['profile'], ctx['source'])
+    ctx['completeness'] = ctx['quality']['completeness']
+    check_thresholds(ctx['quality'], ctx['module_cfg'], ctx['source'])
+
+def stats_db(cfg):
+    return cfg['paths'].get('stats_db', './logs/etl_stats.db')
+
+def record(result, cfg):
+    """Parent-side bookkeeping for a finished file: manifest entry and stored profile."""
+    update_manifest(result['curated'], cfg['paths']['manifest'], digest=result['digest'])
+    save_profile(stats_db(cfg), result['module'], result['source'], result['quality'])
+
+def save_timings(cfg, module, source, timings):
+    log_timings(source, timings)
+    sink = get_sink(stats_db(cfg))
+    for t in timings:
+        sink.record_stage(module, source, **t)
+
+def stage_record(ctx):
+    record(ctx, ctx['cfg'])
+
+def stage_merge(ctx):
+    ctx['merge'] = merge_file(ctx['module'], ctx['curated'], ctx['module_cfg'], ctx['cfg'])
+
+IN_MEMORY_STAGES = [
+    ('read', stage_read),
+    ('validate', stage_validate),
+    ('clean', stage_clean),
+    ('write', stage_write),
+    ('profile', stage_profile),
+    ('promote', stage_promote),
+]
+STREAMING_STAGES = [
+    ('validate', stage_validate_header),
+    ('stream', stage_stream),
+    ('profile', stage_profile),
+    ('promote', stage_promote),
+]
+
+def stream_chunk_rows(path, cfg):
+    """Chunk size to stream `path` with, or None to process it in memory."""
+    settings = cfg.get('settings', {})
+    threshold = settings.get('stream_threshold_mb')
+    if threshold is None or os.path.getsize(path) < threshold * 1024 * 1024:
+        return None
+    return settings.get('chunk_rows', 200_000)
+
+def process_file(module, path, module_cfg, cfg, record=True, schema=None):
+    """Run every stage for one file; the scheduler passes record=False and records the results itself."""
+    ctx = {'module': module, 'source': path, 'module_cfg': module_cfg, 'cfg': cfg,
+           'schema': schema or Schema(module_cfg, module),
+           'chunk_rows': stream_chunk_rows(path, cfg), 'timings': []}
+    stages = STREAMING_STAGES if ctx['chunk_rows'] else IN_MEMORY_STAGES
+    if record:
+        stages = stages + [('record', stage_record), ('merge', stage_merge)]
+    try:
+        for name, stage in stages:
+            with timed(ctx, name):
+                stage(ctx)
+    except Exception:
+        if ctx.get('curated_writer'):
+            ctx['curated_writer'].abort()
+        raise
+    if record:
+        save_timings(cfg, module, path, ctx['timings'])
+    return ctx
@@ -1,23 +1,212 @@
-import os, time, logging, shutil, datetime
+import os, time, logging, datetime, re
+from concurrent.futures import ThreadPoolExecutor
+from src import hashing
+from src.fs_utils import clone_file
 
-def purge_old_files(path, retention_days):
-    now = time.time()
-    cutoff = now - (retention_days * 86400)
-    removed = []
-    for root, _, files in os.walk(path):
-        for f in files:
-            full = os.path.join(root, f)
-            if os.path.getmtime(full) < cutoff:
-                os.remove(full)
-                removed.append(full)
-    logging.info(f"Purged {len(removed)} old files from {path}")
+OBJECTS_DIR = 'objects'
+DATED_DIR = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+SAMPLE_SIZE = 20
+
+# -------- RETENTION --------
+# One os.scandir pass per zone: each DirEntry's stat is fetched once and reused
+# for both the age check and the byte count. Expired paths are deleted in
+# fixed-size batches on a small thread pool with a bounded number of batches
+# in flight, so memory stays flat however many files a zone holds; only
+# counts, bytes and a short sample of paths are kept for the report.
+
+def _new_stats(zone, dry_run):
+    return {'zone': zone, 'dry_run': dry_run, 'scanned': 0, 'files': 0, 'bytes': 0,
+            'dirs': 0, 'errors': 0, 'sample': []}
+
+class _BatchDeleter:
+    def __init__(self, stats, dry_run, batch_size, workers):
+        self.stats, self.dry_run, self.batch_size = stats, dry_run, batch_size
+        self.batch, self.pending = [], []
+        self.pool = None if dry_run else ThreadPoolExecutor(max_workers=workers)
+        self.max_pending = workers * 2
+
+    def add(self, path, freed_bytes):
+        self.stats['files'] += 1
+        self.stats['bytes'] += freed_bytes
+        if len(self.stats['sample']) < SAMPLE_SIZE:
+            self.stats['sample'].append(path)
+        if self.dry_run:
+            return
+        self.batch.append(path)
+        if len(self.batch) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        if self.batch:
+            self.pending.append(self.pool.submit(_remove_batch, self.batch))
+            self.batch = []
+        while len(self.pending) > self.max_pending:
+            self.stats['errors'] += self.pending.pop(0).result()
+
+    def close(self):
+        if self.pool is None:
+            return
+        self._submit()
+        for fut in self.pending:
+            self.stats['errors'] += fut.result()
+        self.pending = []
+        self.pool.shutdown()
+
+def _remove_batch(paths):
+    errors = 0
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError as e:
+            logging.error(f"Could not remove {p}: {e}")
+            errors += 1
+    return errors
+
+def _scan(path, cutoff, deleter, empty_dirs):
+    """Queue expired files under `path`; return True if nothing will remain in it."""
+    remaining = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if _scan(entry.path, cutoff, deleter, empty_dirs):
+                    empty_dirs.append(entry.path)
+                else:
+                    remaining += 1
+                continue
+            deleter.stats['scanned'] += 1
+            st = entry.stat(follow_symlinks=False)
+            if st.st_mtime < cutoff:
+                # removing one of several hard links frees no space
+                deleter.add(entry.path, st.st_size if st.st_nlink <= 1 else 0)
+            else:
+                remaining += 1
+    return remaining == 0
+
+def _remove_dirs(dirs, stats, dry_run):
+    for d in dirs:  # post-order: children before parents
+        stats['dirs'] += 1
+        if not dry_run:
+            try:
+                os.rmdir(d)
+            except OSError as e:
+                logging.error(f"Could not remove directory {d}: {e}")
+                stats['errors'] += 1
+
+def purge_old_files(path, retention_days, dry_run=False, batch_size=1000, workers=4, zone=None):
+    """Delete files older than retention_days under path, then any directories left empty."""
+    cutoff = time.time() - (retention_days * 86400)
+    stats = _new_stats(zone or path, dry_run)
+    if not os.path.isdir(path):
+        return stats
+    deleter, empty_dirs = _BatchDeleter(stats, dry_run, batch_size, workers), []
+    try:
+        _scan(path, cutoff, deleter, empty_dirs)
+    finally:
+        deleter.close()
+    _remove_dirs(empty_dirs, stats, dry_run)
+    logging.info(f"{'Would purge' if dry_run else 'Purged'} {stats['files']} old files "
+                 f"({stats['bytes']} bytes) and {stats['dirs']} empty directories from {path}")
+    return stats
+
+def purge_archive(archive_dir, retention_days, dry_run=False, batch_size=1000, workers=4):
+    """Remove dated snapshots older than retention_days and objects nothing links to any more."""
+    stats = _new_stats('archive', dry_run)
+    if not os.path.isdir(archive_dir):
+        return stats
+    cutoff = (datetime.date.today() - datetime.timedelta(days=retention_days)).isoformat()
+    deleter = _BatchDeleter(stats, dry_run, batch_size, workers)
+    expired, empty_dirs = [], []
+    try:
+        with os.scandir(archive_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False) and DATED_DIR.match(entry.name) and entry.name < cutoff:
+                    expired.append(entry.path)
+                    _scan(entry.path, float('inf'), deleter, empty_dirs)
+                    empty_dirs.append(entry.path)
+        deleter.close()  # snapshot links must be gone before directories go and object link counts are read
+        _remove_dirs(empty_dirs, stats, dry_run)
+        # In a dry run the expired snapshots still hold their links; discount them.
+        discount = _link_counts(expired) if dry_run else {}
+        objects = os.path.join(archive_dir, OBJECTS_DIR)
+        deleter = _BatchDeleter(stats, dry_run, batch_size, workers)
+        if os.path.isdir(objects):
+            with os.scandir(objects) as shards:
+                for shard in shards:
+                    if not shard.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(shard.path) as it:
+                        for entry in it:
+                            stats['scanned'] += 1
+                            st = entry.stat(follow_symlinks=False)
+                            if st.st_nlink - discount.get(st.st_ino, 0) <= 1:
+                                deleter.add(entry.path, st.st_size)
+    finally:
+        deleter.close()
+    logging.info(f"{'Would purge' if dry_run else 'Purged'} {len(expired)} archive snapshots older than {cutoff}: "
+                 f"{stats['files']} files, {stats['bytes']} bytes")
+    return stats
+
+def _link_counts(dirs):
+    counts = {}
+    for d in dirs:
+        for root, _, files in os.walk(d):
+            for f in files:
+                ino = os.stat(os.path.join(root, f), follow_symlinks=False).st_ino
+                counts[ino] = counts.get(ino, 0) + 1
+    return counts
+
+def retention_policies(cfg):
+    """Days to keep per zone: the retention: block, falling back to settings.retention_days for raw."""
+    policies = dict(cfg.get('retention') or {})
+    policies.setdefault('raw', cfg['settings']['retention_days'])
+    return policies
+
+def apply_retention(cfg, dry_run=False, zones=None):
+    results = {}
+    settings = cfg.get('settings', {})
+    opts = {'batch_size': settings.get('purge_batch_size', 1000), 'workers': settings.get('purge_workers', 4)}
+    for zone, days in retention_policies(cfg).items():
+        if zones and zone not in zones:
+            continue
+        if zone == 'archive':
+            results[zone] = purge_archive(cfg['paths']['archive'], days, dry_run, **opts)
+        else:
+            results[zone] = purge_old_files(cfg['paths'][zone], days, dry_run, zone=zone, **opts)
+    return results
 
 def archive_curated_data(curated_dir, archive_dir):
+    """Snapshot the curated zone into archive/<date>/ as links to content-addressed objects."""
     today = datetime.date.today().isoformat()
     archive_path = os.path.join(archive_dir, today)
-    os.makedirs(archive_path, exist_ok=True)
-    for f in os.listdir(curated_dir):
-        src = os.path.join(curated_dir, f)
-        dst = os.path.join(archive_path, f)
-        shutil.copy2(src, dst)
-    logging.info(f"Archived curated files to {archive_path}")
+    objects = os.path.join(archive_dir, OBJECTS_DIR)
+    digests = os.path.join(objects, 'digests.json')
+    os.makedirs(objects, exist_ok=True)
+    hashing.load_digest_cache(digests)
+    stats = {'files': 0, 'new_objects': 0, 'new_bytes': 0, 'link': 0, 'reflink': 0, 'copy': 0}
+    keys = []
+    for root, dirs, files in os.walk(curated_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for f in files:
+            if f.startswith('.'):  # in-progress writes
+                continue
+            src = os.path.join(root, f)
+            digest = hashing.hash_file(src)
+            keys.append(hashing.stat_key(src))
+            obj = os.path.join(objects, digest[:2], digest)
+            if not os.path.exists(obj):
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                tmp = f'{obj}.inprogress'
+                if clone_file(src, tmp) != 'link':
+                    os.chmod(tmp, 0o444)  # a hard link shares its mode with the live curated file; leave it
+                os.replace(tmp, obj)
+                stats['new_objects'] += 1
+                stats['new_bytes'] += os.path.getsize(obj)
+            dst = os.path.join(archive_path, os.path.relpath(src, curated_dir))
+            if not os.path.exists(dst):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                stats[clone_file(obj, dst)] += 1
+            stats['files'] += 1
+    hashing.save_digest_cache(digests, keys)
+    logging.info(f"Archived {stats['files']} curated files to {archive_path}: {stats['new_objects']} new objects "
+                 f"({stats['new_bytes']} bytes), {stats['link']} links, {stats['reflink']} reflinks, {stats['copy']} copies")
+    return stats
@@ -0,0 +1,96 @@
+import sqlite3, os, datetime, re
+from src.metrics import ROLLUP_BACKFILL, migrate
+
+def connect(db_path, readonly=True):
+    if readonly:
+        conn = sqlite3.connect(f'file:{os.path.abspath(db_path)}?mode=ro', uri=True)
+    else:
+        conn = sqlite3.connect(db_path, timeout=30)
+        migrate(conn)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def parse_since(value, today=None):
+    """'7d', '4w' or an ISO date -> date."""
+    today = today or datetime.date.today()
+    m = re.fullmatch(r'(\d+)([dw])', str(value).strip())
+    if m:
+        days = int(m.group(1)) * (7 if m.group(2) == 'w' else 1)
+        return today - datetime.timedelta(days=days - 1)  # '7d' = today and the six days before it
+    return datetime.date.fromisoformat(str(value))
+
+def _spans(since, until):
+    """[(grain, first, last)] covering since..until: head days, whole weeks (by Monday), tail days."""
+    week_start = since + datetime.timedelta(days=-since.weekday() % 7)
+    week_end = until + datetime.timedelta(days=1)
+    week_end -= datetime.timedelta(days=week_end.weekday())  # Monday after the last whole week
+    if week_end <= week_start:
+        return [('day', since, until)]
+    spans = [('week', week_start, week_end - datetime.timedelta(days=7))]
+    if since < week_start:
+        spans.append(('day', since, week_start - datetime.timedelta(days=1)))
+    if week_end <= until:
+        spans.append(('day', week_end, until))
+    return spans
+
+def _where(scope, since, until):
+    clauses, args = [], []
+    for grain, first, last in _spans(since, until):
+        clauses.append('(grain = ? AND scope = ? AND period BETWEEN ? AND ?)')
+        args += [grain, scope, first.isoformat(), last.isoformat()]
+    return ' OR '.join(clauses), args
+
+def percentile(buckets, q):
+    """Upper bound of the bucket holding the q-th quantile of [(upper_sec, n), ...] (sorted)."""
+    total = sum(n for _, n in buckets)
+    if not total:
+        return None
+    seen = 0
+    for upper, n in buckets:
+        seen += n
+        if seen >= q * total:
+            return round(upper, 3)
+    return round(buckets[-1][0], 3)
+
+def _at_most(value, limit):
+    return value if value is None or limit is None else min(value, limit)
+
+def summary(conn, since, until=None, scope='run'):
+    until = until or datetime.date.today()
+    where, args = _where(scope, since, until)
+    row = conn.execute(f'SELECT COALESCE(sum(runs), 0), COALESCE(sum(successes), 0), COALESCE(sum(total_sec), 0), '
+                       f'COALESCE(sum(timed), 0), max(max_sec), COALESCE(sum(rows), 0) FROM etl_rollup '
+                       f'WHERE {where}', args).fetchone()
+    runs, successes, total_sec, timed, max_sec, rows = row
+    buckets = conn.execute(f'SELECT b.upper_sec, sum(h.n) FROM etl_rollup_hist h '
+                           f'JOIN etl_rollup_bucket b ON b.bucket = h.bucket WHERE {where} '
+                           f'GROUP BY h.bucket ORDER BY h.bucket', args).fetchall()
+    return {'scope': scope, 'since': since.isoformat(), 'until': until.isoformat(),
+            'runs': runs, 'successes': successes, 'failures': runs - successes,
+            'success_rate': round(100 * successes / runs, 1) if runs else None,
+            'avg_sec': round(total_sec / timed, 2) if timed else None,
+            'p50_sec': _at_most(percentile(buckets, 0.5), max_sec),
+            'p95_sec': _at_most(percentile(buckets, 0.95), max_sec),
+            'max_sec': None if max_sec is None else round(max_sec, 3), 'rows': rows}
+
+def series(conn, since, until=None, scope='run', grain='day'):
+    """Per-period rows (for trend charts), oldest first."""
+    until = until or datetime.date.today()
+    return [dict(r) for r in conn.execute(
+        'SELECT period, runs, successes, runs - successes AS failures, '
+        'round(100.0 * successes / runs, 1) AS success_rate, '
+        'CASE WHEN timed THEN round(total_sec / timed, 2) END AS avg_sec, max_sec, rows '
+        'FROM etl_rollup WHERE grain = ? AND scope = ? AND period BETWEEN ? AND ? ORDER BY period',
+        (grain, scope, since.isoformat(), until.isoformat()))]
+
+def scopes(conn):
+    return [r[0] for r in conn.execute("SELECT DISTINCT scope FROM etl_rollup WHERE grain = 'week' ORDER BY scope")]
+
+def backfill(db_path):
+    """Rebuild every rollup from etl_runtime and etl_file_timing."""
+    conn = connect(db_path, readonly=False)
+    try:
+        conn.executescript('BEGIN;' + ROLLUP_BACKFILL + 'COMMIT;')
+        return conn.execute("SELECT count(*) FROM etl_rollup").fetchone()[0]
+    finally:
+        conn.close()
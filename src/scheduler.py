@@ -0,0 +1,179 @@
+import glob, logging, os, time, signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.pipeline import process_file, record, stats_db, save_timings
+from src.instrumentation import timed
+from src.metrics import get_sink
+from src.validate_schema import load_module
+from src.curated_merge import primary_key, merge_file, snapshot_date
+from src import change_cache, hashing, csv_io
+
+def _matches(module, path):
+    return module.upper() in os.path.basename(path).upper()
+
+def discover(modules, pattern='data/incoming/*'):
+    files = sorted(f for f in glob.glob(pattern) if csv_io.is_csv(f))  # .csv, .csv.gz, .csv.zst, ...
+    return [(m, f) for m in modules for f in files if _matches(m, f)]
+
+def run_file(module, path, cfg):
+    hashing.configure(cfg)  # workers may be spawned rather than forked
+    csv_io.configure(cfg)
+    start = time.perf_counter()
+    module_cfg, schema = load_module(module)  # compiled once per worker, reloaded if the YAML changes
+    ctx = process_file(module, path, module_cfg, cfg, record=False, schema=schema)
+    return {'module': module, 'source': path, 'curated': ctx['curated'],
+            'digest': ctx['digest'], 'completeness': ctx['completeness'], 'quality': ctx['quality'],
+            'wall_sec': round(time.perf_counter() - start, 3), 'timings': ctx['timings']}
+
+def _record(report, result, cfg, cache, fingerprints, merges):
+    with timed(result, 'record'):
+        record(result, cfg)
+    if primary_key(load_module(result['module'])[0]):
+        merges.append(result)  # merged by _merge_all once every file is in
+        return
+    _done(report, result, cfg, cache, fingerprints)
+
+def _done(report, result, cfg, cache, fingerprints):
+    save_timings(cfg, result['module'], result['source'], result['timings'])
+    change_cache.record(cache, result['module'], result['source'], fingerprints[result['source']])
+    _checkpoint(cache, cfg)
+    get_sink(stats_db(cfg)).record_file(result['module'], result['source'], 'success', result['wall_sec'],
+                                        rows=result['quality']['rows'], bytes_in=_size(result['source']),
+                                        bytes_out=_size(result['curated']))
+    report['processed'].append(result)
+
+def _merge_all(report, merges, cfg, cache, fingerprints):
+    """Merge deferred snapshots oldest first per module; a failure fails that file only."""
+    for result in sorted(merges, key=lambda r: (r['module'], snapshot_date(r['source']) or '',
+                                                 os.path.basename(r['source']))):
+        try:
+            with timed(result, 'merge'):
+                result['merge'] = merge_file(result['module'], result['curated'],
+                                             load_module(result['module'])[0], cfg)
+        except Exception as e:
+            save_timings(cfg, result['module'], result['source'], result['timings'])
+            _fail(report, result['module'], result['source'], f"merge failed: {e}", cfg)
+            continue
+        _done(report, result, cfg, cache, fingerprints)
+    merges.clear()
+
+def _fail(report, module, path, exc, cfg):
+    logging.error(f"{module}: {path} failed: {exc}")
+    get_sink(stats_db(cfg)).record_file(module, path, 'failure', bytes_in=_size(path), error=str(exc))
+    report['failed'].append({'module': module, 'source': path, 'error': str(exc)})
+
+def _shield_worker():
+    """Pool initializer: leave shutdown signals to the parent, which finishes in-flight files."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+def _load_cache(cfg):
+    """The change cache without entries for deleted files, plus its hash index."""
+    cache = change_cache.load_cache(change_cache.cache_path(cfg))
+    if pruned := change_cache.prune(cache):
+        logging.info(f"Change cache: dropped {pruned} entries for files that no longer exist")
+    return cache, change_cache.hash_index(cache)
+
+def _checkpoint(cache, cfg):
+    change_cache.save_cache(cache, change_cache.cache_path(cfg),
+                            cfg.get('settings', {}).get('cache_save_interval_sec', change_cache.SAVE_INTERVAL_SEC))
+
+def _plan(tasks, cfg, cache, by_hash, force, report):
+    """Drop tasks already in the change cache; return the rest plus the fingerprints to record on success."""
+    todo, fingerprints = [], {}
+    # Hash new or modified inputs concurrently up front; check() then hits the digest cache.
+    hashing.hash_files({f for m, f in tasks if force or not change_cache.is_unchanged(cache, m, f)})
+    for m, f in tasks:
+        if force:
+            reason, fp = None, change_cache.fingerprint(f)
+        else:
+            reason, fp = change_cache.check(cache, m, f, by_hash)
+        if reason:
+            logging.info(f"{m}: skipping {f}: {reason}")
+            report['skipped'].append({'module': m, 'source': f, 'reason': reason})
+            continue
+        todo.append((m, f))
+        fingerprints[f] = fp
+        by_hash.setdefault((m, fp['hash']), f)
+    if report['skipped']:
+        _checkpoint(cache, cfg)
+    return todo, fingerprints
+
+def _finish(report, fut, module, path, cfg, cache, fingerprints, merges):
+    try:
+        result = fut.result()
+    except Exception as e:
+        _fail(report, module, path, e, cfg)
+        return
+    _record(report, result, cfg, cache, fingerprints, merges)
+
+def _run_inline(report, module, path, cfg, cache, fingerprints, merges):
+    try:
+        result = run_file(module, path, cfg)
+    except Exception as e:
+        _fail(report, module, path, e, cfg)
+        return
+    _record(report, result, cfg, cache, fingerprints, merges)
+
+def run_modules(modules, cfg, jobs=None, force=False):
+    jobs = jobs or cfg.get('settings', {}).get('max_parallel_jobs', 1)
+    hashing.configure(cfg)
+    csv_io.configure(cfg)
+    report = {'processed': [], 'skipped': [], 'failed': []}
+    cache, by_hash = _load_cache(cfg)
+    tasks, fingerprints = _plan(discover(modules), cfg, cache, by_hash, force, report)
+    merges = []
+    logging.info(f"Scheduling {len(tasks)} file(s) for {', '.join(modules)} with {jobs} job(s), "
+                 f"{len(report['skipped'])} skipped")
+    if jobs <= 1:
+        for m, f in tasks:
+            _run_inline(report, m, f, cfg, cache, fingerprints, merges)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(run_file, m, f, cfg): (m, f) for m, f in tasks}
+            for fut in as_completed(futures):
+                _finish(report, fut, *futures[fut], cfg, cache, fingerprints, merges)
+    _merge_all(report, merges, cfg, cache, fingerprints)
+    change_cache.save_cache(cache, change_cache.cache_path(cfg))
+    get_sink(stats_db(cfg)).flush()
+    return report
+
+def run_files(files, modules, cfg, jobs=None, force=False, graceful=False):
+    """Like run_modules, but plans and submits each path from an iterable as soon as it arrives."""
+    jobs = jobs or cfg.get('settings', {}).get('max_parallel_jobs', 1)
+    hashing.configure(cfg)
+    csv_io.configure(cfg)
+    report = {'processed': [], 'skipped': [], 'failed': []}
+    (cache, by_hash), fingerprints, merges = _load_cache(cfg), {}, []
+    def plan(path):
+        tasks, fps = _plan([(m, path) for m in modules if _matches(m, path)], cfg, cache, by_hash, force, report)
+        fingerprints.update(fps)
+        return tasks
+    if jobs <= 1:
+        for path in files:
+            for m, f in plan(path):
+                _run_inline(report, m, f, cfg, cache, fingerprints, merges)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_shield_worker if graceful else None) as pool:
+            pending = {}
+            for path in files:
+                for m, f in plan(path):
+                    pending[pool.submit(run_file, m, f, cfg)] = (m, f)
+                for fut in [x for x in pending if x.done()]:  # record finished files without waiting
+                    _finish(report, fut, *pending.pop(fut), cfg, cache, fingerprints, merges)
+            for fut in as_completed(pending):
+                _finish(report, fut, *pending[fut], cfg, cache, fingerprints, merges)
+    _merge_all(report, merges, cfg, cache, fingerprints)
+    change_cache.save_cache(cache, change_cache.cache_path(cfg))
+    get_sink(stats_db(cfg)).flush()
+    return report
+
+def raise_for_failures(report):
+    if report['failed']:
+        names = ', '.join(os.path.basename(x['source']) for x in report['failed'])
+        raise RuntimeError(f"{len(report['failed'])} file(s) failed: {names}")
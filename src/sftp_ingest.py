@@ -0,0 +1,198 @@
+import os, json, threading, queue, logging, contextlib, types
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src import hashing, csv_io
+try:
+    import paramiko
+except ImportError:  # only needed for real SFTP hosts
+    paramiko = None
+
+BUFFER_SIZE = 1024 * 1024
+DEFAULTS = {'port': 22, 'max_connections': 4, 'timeout_sec': 30}
+
+# -------- clients --------
+class LocalSFTPClient:
+    """Filesystem stand-in for paramiko.SFTPClient: remote paths resolve under root."""
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, path):
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def listdir_attr(self, path):
+        out = []
+        with os.scandir(self._path(path)) as it:
+            for e in it:
+                if e.is_file():
+                    st = e.stat()
+                    out.append(types.SimpleNamespace(filename=e.name, st_size=st.st_size, st_mtime=int(st.st_mtime)))
+        return out
+
+    def open(self, path, mode='rb'):
+        return open(self._path(path), mode)
+
+    def close(self):
+        pass
+
+class ParamikoClient:
+    """paramiko SSH transport + SFTP session, closed together."""
+    def __init__(self, sftp_cfg):
+        if paramiko is None:
+            raise RuntimeError("SFTP ingest needs paramiko (pip install paramiko) or a file:// host")
+        self.ssh = paramiko.SSHClient()
+        self.ssh.load_system_host_keys()
+        self.ssh.set_missing_host_key_policy(paramiko.RejectPolicy())
+        key = sftp_cfg.get('private_key')
+        self.ssh.connect(sftp_cfg['host'], port=sftp_cfg['port'], username=sftp_cfg.get('user'),
+                         key_filename=os.path.expanduser(key) if key else None,
+                         timeout=sftp_cfg['timeout_sec'], banner_timeout=sftp_cfg['timeout_sec'])
+        self.sftp = self.ssh.open_sftp()
+        self.sftp.get_channel().settimeout(sftp_cfg['timeout_sec'])
+
+    def listdir_attr(self, path):
+        return self.sftp.listdir_attr(path)
+
+    def open(self, path, mode='rb'):
+        f = self.sftp.open(path, mode)
+        f.set_pipelined(True)
+        return f
+
+    def close(self):
+        self.sftp.close()
+        self.ssh.close()
+
+def sftp_settings(cfg):
+    return DEFAULTS | (cfg.get('sftp') or {})
+
+def connect(sftp_cfg):
+    if str(sftp_cfg['host']).startswith('file://'):
+        return LocalSFTPClient(sftp_cfg['host'][len('file://'):])
+    return ParamikoClient(sftp_cfg)
+
+class ConnectionPool:
+    """At most `size` reusable connections; one that raised is closed instead of returned."""
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextlib.contextmanager
+    def client(self):
+        with self.slots:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self.factory()
+            try:
+                yield conn
+            except Exception:
+                conn.close()
+                raise
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+# -------- state --------
+def state_path(cfg):
+    return cfg['paths'].get('ingest_state') or os.path.join(os.path.dirname(cfg['paths']['manifest']),
+                                                            'ingest_state.json')
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+# -------- transfer --------
+def _download(conn, remote, part, size, offset):
+    with conn.open(remote, 'rb') as src, open(part, 'ab' if offset else 'wb') as dst:
+        if offset:
+            src.seek(offset)
+        if hasattr(src, 'prefetch'):
+            src.prefetch(size)  # paramiko: pipeline reads from the current position up to file_size
+        while block := src.read(BUFFER_SIZE):
+            dst.write(block)
+    got = os.path.getsize(part)
+    if got != size:
+        raise IOError(f"{remote}: got {got} of {size} bytes")
+
+def fetch_one(pool, attr, remote_dir, local_dir, state, lock, save, force=False):
+    """Download one remote file; returns (local path, digest), or None if the bytes are already known and not forced."""
+    name, size, mtime = attr.filename, attr.st_size, int(attr.st_mtime)
+    final, part = os.path.join(local_dir, name), os.path.join(local_dir, f'.{name}.part')
+    with lock:
+        partial = state.get('partial', {}).get(name)
+        state.setdefault('partial', {})[name] = {'size': size, 'mtime': mtime}
+        save()
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if offset and (partial != {'size': size, 'mtime': mtime} or offset > size):
+        offset = 0  # remote changed since the partial transfer; start over
+    if offset:
+        logging.info(f"Resuming {name} at {offset} of {size} bytes")
+    with pool.client() as conn:
+        _download(conn, f"{remote_dir.rstrip('/')}/{name}", part, size, offset)
+    os.utime(part, (mtime, mtime))
+    digest = hashing.hash_file(part)
+    with lock:
+        previous = state.get('files', {}).get(name)
+        state['partial'].pop(name, None)
+        state.setdefault('files', {})[name] = {'size': size, 'mtime': mtime, 'digest': digest}
+        save()
+    if not force and previous and previous.get('digest') == digest and os.path.exists(final):
+        os.remove(part)
+        logging.info(f"{name}: re-published with identical content, skipped")
+        return None
+    os.replace(part, final)
+    logging.info(f"Fetched {name} ({size} bytes)")
+    return final, digest
+
+def fetch(cfg, stats=None, connections=None, force=False):
+    """Yield local paths of new or changed remote files as each download completes; fills `stats` with counts."""
+    sftp_cfg = sftp_settings(cfg)
+    stats = {} if stats is None else stats
+    stats.update(listed=0, skipped=0, fetched=0, unchanged=0, failed=0, errors=[])
+    remote_dir, local_dir = sftp_cfg['remote_dir'], sftp_cfg['local_dir']
+    os.makedirs(local_dir, exist_ok=True)
+    spath = state_path(cfg)
+    state, lock = load_state(spath), threading.Lock()
+    size = connections or sftp_cfg['max_connections']
+    pool = ConnectionPool(lambda: connect(sftp_cfg), size)
+    try:
+        with pool.client() as conn:
+            listing = [a for a in conn.listdir_attr(remote_dir) if csv_io.is_csv(a.filename)]
+        stats['listed'] = len(listing)
+        todo = []
+        for a in listing:
+            known = state.get('files', {}).get(a.filename)
+            if not force and known and known['size'] == a.st_size and known['mtime'] == int(a.st_mtime):
+                stats['skipped'] += 1
+                continue
+            todo.append(a)
+        logging.info(f"SFTP {remote_dir}: {len(listing)} listed, {len(todo)} to fetch over {size} connection(s)")
+        with ThreadPoolExecutor(max_workers=size) as workers:
+            futures = {workers.submit(fetch_one, pool, a, remote_dir, local_dir, state, lock,
+                                      lambda: save_state(state, spath), force): a.filename for a in todo}
+            for fut in as_completed(futures):
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    stats['errors'].append(f"{futures[fut]}: {e}")
+                    logging.error(f"SFTP fetch of {futures[fut]} failed: {e}")
+                    continue
+                if result is None:
+                    stats['unchanged'] += 1
+                    continue
+                stats['fetched'] += 1
+                yield result[0]
+    finally:
+        pool.close()
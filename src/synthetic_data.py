@@ -0,0 +1,65 @@
+import numpy as np, pandas as pd, os
+from src.validate_schema import column_rules
+
+VALUE_POOLS = {
+    'status': ['Active', 'Closed', 'Pending', 'Suspended'],
+    'sponsor': ['NIH', 'NSF', 'DOD', 'DOE', 'Gates Foundation', 'Simons Foundation'],
+}
+BASE_DATE = np.datetime64('2020-01-01')
+
+def key_columns(module_cfg):
+    """Columns that must never be null: nullable: false or zero max_null_rate, else the first column."""
+    limits = ((module_cfg.get('quality') or {}).get('max_null_rate') or {})
+    keys = [c for c, rate in limits.items() if rate == 0]
+    keys += [c for c, rule in column_rules(module_cfg).items() if not rule['nullable'] and c not in keys]
+    return keys or module_cfg['expected_columns'][:1]
+
+def dirty_header(name):
+    return f" {name.replace('_', ' ').title()} "
+
+def _pool(name, size=5000):
+    return np.array([f"{name.replace('_', ' ').title()} {i}" for i in range(size)], dtype=object)
+
+def _column(name, kind, start, n, rng, prefix, is_key, enum=None):
+    if is_key:
+        return prefix + pd.Series(np.arange(start, start + n)).astype(str).str.zfill(9)
+    if kind == 'int':
+        return pd.Series(rng.integers(0, 1_000_000, n))
+    if kind == 'float':
+        return pd.Series(rng.uniform(1_000, 5_000_000, n).round(2))
+    if kind == 'bool':
+        return pd.Series(rng.integers(0, 2, n).astype(bool))
+    if kind in ('date', 'datetime'):
+        unit = 'D' if kind == 'date' else 's'
+        span = 2000 if kind == 'date' else 2000 * 86400
+        return pd.Series((BASE_DATE.astype(f'datetime64[{unit}]') + rng.integers(0, span, n)).astype(str))
+    pool = np.array(enum or VALUE_POOLS.get(name, []), dtype=object) if enum or kind == 'category' else None
+    if pool is None or not len(pool):
+        pool = _pool(name, 8 if kind == 'category' else 5000)
+    return pd.Series(pool[rng.integers(0, len(pool), n)])
+
+def generate_frame(module_cfg, start, n, rng, null_rate=0.0, prefix='ID'):
+    rules = column_rules(module_cfg)
+    keys = set(key_columns(module_cfg))
+    data = {}
+    for name in module_cfg['expected_columns']:
+        rule = rules.get(name) or {'type': 'string', 'enum': None}
+        col = _column(name, rule['type'], start, n, rng, prefix, name in keys, rule['enum'])
+        if null_rate and name not in keys:
+            col = col.astype(object).mask(rng.random(n) < null_rate)
+        data[name] = col
+    return pd.DataFrame(data)
+
+def generate_csv(path, module_cfg, rows, seed=0, null_rate=0.0, dirty_headers=False, prefix=None,
+                 block_rows=500_000):
+    """Write `rows` synthetic rows to `path` and return the path."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    rng = np.random.default_rng(seed)
+    prefix = prefix or os.path.basename(path).split('_')[0].upper()
+    header = [dirty_header(c) if dirty_headers else c for c in module_cfg['expected_columns']]
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(header) + '\n')
+        for start in range(0, rows, block_rows):
+            df = generate_frame(module_cfg, start, min(block_rows, rows - start), rng, null_rate, prefix)
+            df.to_csv(f, header=False, index=False)
+    return path
@@ -1,11 +1,37 @@
-import pandas as pd, os, logging, datetime
+import os, logging, datetime
+from src.metadata_utils import HashingWriter
+from src.csv_io import normalize_header, read_frame, read_chunks, write_frame, plain_name
 
-def clean_data(input_file, output_dir):
-    df = pd.read_csv(input_file)
-    df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
+def clean_frame(df):
+    df.columns = [normalize_header(c) for c in df.columns]
     df['load_date'] = datetime.date.today().isoformat()
+    return df
+
+def write_staged(df, output_dir, name):
+    """Write a cleaned frame to staging, hashing the bytes as they are written."""
+    os.makedirs(output_dir, exist_ok=True)
+    out = os.path.join(output_dir, plain_name(name))
+    with HashingWriter(out, binary=True) as w:
+        write_frame(df, w)
+    return out, w.hexdigest()
+
+def write_staged_chunks(chunks, output_dir, name, on_chunk=None):
+    """Clean and append raw chunks to staging one at a time, so memory is bounded by the chunk size."""
     os.makedirs(output_dir, exist_ok=True)
-    out = os.path.join(output_dir, os.path.basename(input_file))
-    df.to_csv(out, index=False)
+    out = os.path.join(output_dir, plain_name(name))
+    with HashingWriter(out, binary=True) as w:
+        for i, df in enumerate(chunks):
+            df = clean_frame(df)
+            write_frame(df, w, header=(i == 0))
+            if on_chunk:
+                on_chunk(df)
+    return out, w.hexdigest()
+
+def clean_data(input_file, output_dir, chunksize=None, types=None):
+    name = os.path.basename(input_file)
+    if chunksize:
+        out, _ = write_staged_chunks(read_chunks(input_file, types, chunksize), output_dir, name)
+    else:
+        out, _ = write_staged(clean_frame(read_frame(input_file, types)), output_dir, name)
     logging.info(f"Cleaned {input_file} -> {out}")
     return out
@@ -1,10 +1,134 @@
-import pandas as pd, yaml, logging
+import pandas as pd, logging, os, re
+from src.csv_io import normalize_header, read_header, read_frame
+from src.config import cached, parse_yaml
+
+TYPES = ('string', 'int', 'float', 'bool', 'date', 'datetime', 'category')
+BOOL_MAP = {'true': True, 'false': False, 'yes': True, 'no': False, '1': True, '0': False}
+
+def column_rules(module_cfg):
+    """{column: {'type', 'nullable', 'regex', 'enum'}} from either YAML form."""
+    rules = {}
+    for name, spec in ((module_cfg or {}).get('columns') or {}).items():
+        spec = spec if isinstance(spec, dict) else {'type': spec}
+        rules[name] = {'type': spec.get('type', 'string'), 'nullable': spec.get('nullable', True),
+                       'regex': spec.get('regex'), 'enum': spec.get('enum')}
+        if rules[name]['type'] not in TYPES:
+            raise ValueError(f"column {name}: unknown type {rules[name]['type']!r}")
+    return rules
+
+def column_types(module_cfg):
+    return {name: rule['type'] for name, rule in column_rules(module_cfg).items()}
+
+def parse_bool(values):
+    """true/false, yes/no, 1/0 in any case and padding -> nullable boolean; anything else becomes NA."""
+    return values.astype('string').str.strip().str.lower().map(BOOL_MAP).astype('boolean')
+
+def parse_values(values, kind):
+    """Non-null values parsed as `kind`; the ones that do not parse come back null."""
+    if kind in ('int', 'float'):
+        parsed = pd.to_numeric(values, errors='coerce')
+        return parsed.where(parsed % 1 == 0).astype('Int64') if kind == 'int' else parsed.astype('float64')
+    if kind in ('date', 'datetime'):
+        return pd.to_datetime(values, errors='coerce')
+    if kind == 'bool':
+        return parse_bool(values)
+    return values
+
+class Schema:
+    def __init__(self, module_cfg, module=None):
+        self.module = module
+        self.expected = [normalize_header(c) for c in module_cfg['expected_columns']]
+        self.rules = column_rules(module_cfg)
+        self.types = {c: r['type'] for c, r in self.rules.items()}
+        self.regex = {c: re.compile(r['regex']) for c, r in self.rules.items() if r['regex']}
+        self.enum = {c: [str(v) for v in r['enum']] for c, r in self.rules.items() if r['enum']}
+        self.max_nonconforming = ((module_cfg.get('quality') or {}).get('max_nonconforming_rate') or 0)
+
+    # -------- header --------
+    def check_header(self, columns, source):
+        present = {normalize_header(c) for c in columns}
+        missing = [c for c in self.expected if c not in present]
+        if missing:
+            raise ValueError(f"{source} missing columns: {missing}")
+        logging.info(f"{source} passed schema validation")
+
+    def check_header_file(self, path):
+        """Header check from the first line only (compressed inputs included)."""
+        header = read_header(path)
+        self.check_header(header, path)
+        return header
+
+    # -------- values --------
+    def new_totals(self):
+        return {'rows': 0, 'present': {}, 'type': {}}
+
+    def check_values(self, df, source, totals=None, parsed=None):
+        """Vectorized rule checks on one chunk; violations raise, type failures accumulate in `totals`, and
+        typed columns are parsed once into `parsed` ({column: values}) for the profile and curated writer."""
+        totals = self.new_totals() if totals is None else totals
+        columns = {normalize_header(c): c for c in df.columns}
+        errors = []
+        for name, rule in self.rules.items():
+            if name not in columns:
+                continue
+            series = df[columns[name]]
+            nulls = series.isna()
+            if not rule['nullable'] and nulls.any():
+                errors.append(f"{name}: {int(nulls.sum())} null value(s)")
+            values = series[~nulls]
+            if not len(values):
+                continue
+            if name in self.enum:
+                bad = ~values.astype(str).isin(self.enum[name])
+                if bad.any():
+                    errors.append(f"{name}: {int(bad.sum())} value(s) outside {self.enum[name]}, "
+                                  f"e.g. {values[bad].iloc[0]!r}")
+            if name in self.regex:
+                bad = ~values.astype(str).str.match(self.regex[name])
+                if bad.any():
+                    errors.append(f"{name}: {int(bad.sum())} value(s) not matching {self.regex[name].pattern!r}, "
+                                  f"e.g. {values[bad].iloc[0]!r}")
+            if rule['type'] not in ('string', 'category'):
+                typed = parse_values(values, rule['type'])
+                totals['present'][name] = totals['present'].get(name, 0) + len(values)
+                if bad := int(typed.isna().sum()):
+                    totals['type'][name] = totals['type'].get(name, 0) + bad
+                if parsed is not None:
+                    parsed[name] = typed
+        totals['rows'] += len(df)
+        if errors:
+            raise ValueError(f"{source} failed value checks: " + '; '.join(errors))
+        return totals
+
+    def finish(self, totals, source):
+        """Enforce quality.max_nonconforming_rate: values that do not parse, over the column's non-null values."""
+        over = {c: n for c, n in totals['type'].items() if n / totals['present'][c] > self.max_nonconforming}
+        if over:
+            raise ValueError(f"{source} has values not matching declared types: " +
+                             ', '.join(f"{c} ({n} of {totals['present'][c]} non-null)" for c, n in over.items()))
+
+    def validate(self, df, source, parsed=None):
+        self.check_header(df.columns, source)
+        self.finish(self.check_values(df, source, parsed=parsed), source)
+        return df
+
+    def sample(self, path, n=1000):
+        """Pre-flight: header from the first line, value rules on the first n rows."""
+        self.check_header_file(path)
+        return self.validate(read_frame(path, self.types, nrows=n), path)
+
+# -------- compiled-once cache --------
+def _compile(path):
+    module_cfg = parse_yaml(path)
+    return module_cfg, Schema(module_cfg, os.path.splitext(os.path.basename(path))[0])
+
+def load_module(module, config_dir='config/modules'):
+    """(module_cfg, Schema) for a module, re-read only when its YAML changes (see src/config.py)."""
+    return cached(os.path.join(config_dir, f'{module}.yaml'), _compile)
 
 def validate_schema(file_path, module_cfg):
-    df = pd.read_csv(file_path)
-    expected = module_cfg['expected_columns']
-    missing = [c for c in expected if c not in df.columns]
-    if missing:
-        raise ValueError(f"{file_path} missing columns: {missing}")
+    """Read a file with its declared types and check it against the module's schema; returns the data."""
+    schema = Schema(module_cfg)
+    df = schema.validate(read_frame(file_path, schema.types), file_path)
     logging.info(f"{file_path} passed schema validation")
     return df
@@ -0,0 +1,173 @@
+import os, time, queue, signal, threading, logging
+from src.scheduler import run_files, discover
+from src.notifier import Dispatcher
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # polling works everywhere
+    INotify = flags = None
+
+DEFAULTS = {'incoming_dir': './data/incoming', 'poll_interval_sec': 2, 'stable_sec': 5, 'inotify': True,
+            'queue_size': 200, 'batch_window_sec': 10, 'max_batch_files': 20, 'max_batch_mb': 512,
+            'cache_save_interval_sec': 30}
+
+def watch_settings(cfg):
+    return DEFAULTS | (cfg.get('watch') or {})
+
+class Scanner:
+    """Tracks (size, mtime) per incoming file and reports the ones that have settled."""
+    def __init__(self, modules, incoming_dir, stable_sec):
+        self.modules, self.stable_sec = modules, stable_sec
+        self.pattern = os.path.join(incoming_dir, '*')
+        self.seen = {}        # path -> (signature, monotonic time it was first seen with it)
+        self.dispatched = {}  # path -> signature handed to the queue
+
+    def scan(self, closed=()):
+        now, ready = time.monotonic(), []
+        paths = sorted({f for _, f in discover(self.modules, self.pattern)})
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if self.dispatched.get(path) == sig:
+                continue
+            if self.seen.get(path, (None,))[0] != sig:
+                self.seen[path] = (sig, now)
+            if path in closed or now - self.seen[path][1] >= self.stable_sec:
+                ready.append((path, sig))
+        live = set(paths)
+        for d in (self.seen, self.dispatched):
+            for gone in [p for p in d if p not in live]:
+                del d[gone]
+        return ready
+
+    def mark(self, path, sig):
+        self.dispatched[path] = sig
+        self.seen.pop(path, None)
+
+class Watcher:
+    def __init__(self, modules, cfg, jobs=None, notifier=None):
+        self.modules, self.jobs = modules, jobs
+        self.settings = s = watch_settings(cfg)
+        self.cfg = cfg | {'settings': cfg.get('settings', {}) | {
+            'cache_save_interval_sec': s['cache_save_interval_sec']}}
+        self.notifier = notifier
+        self.queue = queue.Queue(s['queue_size'])
+        self.stop = threading.Event()
+        self.scanner = Scanner(modules, s['incoming_dir'], s['stable_sec'])
+        self.totals = {'batches': 0, 'processed': 0, 'skipped': 0, 'failed': 0}
+
+    # -------- scanner thread --------
+    def _inotify(self):
+        if INotify is None or not self.settings['inotify']:
+            return None
+        ino = INotify()
+        ino.add_watch(self.settings['incoming_dir'], flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+        logging.info(f"Watching {self.settings['incoming_dir']} with inotify")
+        return ino
+
+    def _wait(self, ino):
+        """Sleep until the next scan; returns paths the kernel reported as complete."""
+        if ino is None:
+            self.stop.wait(self.settings['poll_interval_sec'])
+            return set()
+        events = ino.read(timeout=int(self.settings['poll_interval_sec'] * 1000))
+        done = flags.CLOSE_WRITE | flags.MOVED_TO
+        return {os.path.join(self.settings['incoming_dir'], e.name) for e in events if e.mask & done}
+
+    def _scan_loop(self):
+        os.makedirs(self.settings['incoming_dir'], exist_ok=True)
+        ino, closed, full = self._inotify(), set(), False
+        try:
+            while not self.stop.is_set():
+                for path, sig in self.scanner.scan(closed):
+                    try:
+                        self.queue.put((path, sig[0]), timeout=self.settings['poll_interval_sec'])
+                    except queue.Full:
+                        if not full:
+                            logging.warning(f"Watch queue full ({self.settings['queue_size']}); "
+                                            f"holding new files in {self.settings['incoming_dir']}")
+                        full = True
+                        break
+                    full = False
+                    self.scanner.mark(path, sig)
+                    if self.stop.is_set():
+                        break
+                closed = self._wait(ino)
+        except Exception as e:
+            logging.exception(f"Watch scanner stopped: {e}")
+            self.stop.set()
+        finally:
+            if ino is not None:
+                ino.close()
+
+    # -------- batches --------
+    def _next(self, timeout):
+        try:
+            return self.queue.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+
+    def _batch(self, first):
+        """Paths for one micro-batch, yielded as they become available."""
+        s = self.settings
+        deadline = time.monotonic() + s['batch_window_sec']
+        count, size, item = 0, 0, first
+        while item is not None and not self.stop.is_set():
+            yield item[0]
+            count, size = count + 1, size + item[1]
+            if count >= s['max_batch_files'] or size >= s['max_batch_mb'] * 1024 * 1024:
+                return
+            while (item := self._next(min(deadline - time.monotonic(), 0.5))) is None:
+                if self.stop.is_set() or time.monotonic() >= deadline:
+                    return
+
+    def _run_batch(self, first):
+        report = run_files(self._batch(first), self.modules, self.cfg, self.jobs, graceful=True)
+        self.totals['batches'] += 1
+        for key in ('processed', 'skipped', 'failed'):
+            self.totals[key] += len(report[key])
+        logging.info(f"Watch batch {self.totals['batches']}: {len(report['processed'])} processed, "
+                     f"{len(report['skipped'])} skipped, {len(report['failed'])} failed")
+        if self.notifier:
+            for f in report['failed']:
+                self.notifier.notify(f"ETL file failed: {f['source']}", f"{f['module']}: {f['error']}", "FAILURE")
+        return report
+
+    def run(self, max_batches=None):
+        """Process batches until stopped (or after max_batches); returns running totals."""
+        scanner = threading.Thread(target=self._scan_loop, name='watch-scanner', daemon=True)
+        scanner.start()
+        logging.info(f"Watching {self.settings['incoming_dir']} for {', '.join(self.modules)}")
+        while not self.stop.is_set():
+            first = self._next(0.5)
+            if first is not None:
+                self._run_batch(first)
+                if max_batches and self.totals['batches'] >= max_batches:
+                    break
+        self.stop.set()
+        scanner.join(self.settings['poll_interval_sec'] + 1)
+        left = self.queue.qsize()
+        logging.info(f"Watch stopped after {self.totals['batches']} batch(es); "
+                     f"{left} queued file(s) left in {self.settings['incoming_dir']} for the next start")
+        return self.totals
+
+    def handle_signals(self):
+        def on_signal(signum, frame):
+            if self.stop.is_set():
+                logging.warning("Second signal; exiting without waiting for the current batch")
+                os._exit(1)
+            logging.info(f"Signal {signum}: finishing in-flight files, then stopping")
+            self.stop.set()
+        signal.signal(signal.SIGINT, on_signal)
+        signal.signal(signal.SIGTERM, on_signal)
+
+def watch(modules, cfg, jobs=None, max_batches=None):
+    notifier = Dispatcher(cfg)
+    watcher = Watcher(modules, cfg, jobs, notifier)
+    watcher.handle_signals()
+    try:
+        return watcher.run(max_batches)
+    finally:
+        notifier.close()
@@ -0,0 +1,13 @@
+from src.benchmark import _cfg, _suite_cfg, bench_bytes_read
+
+def test_benchmark_configs_stay_in_temp_root(tmp_path):
+    root = str(tmp_path)
+    for cfg in (_cfg(root), _suite_cfg(root)):
+        for key in ('staging', 'curated', 'manifest', 'stats_db', 'warehouse'):
+            assert cfg['paths'][key].startswith(root), key
+
+def test_bytes_read_compares_the_frozen_baseline_with_the_pipeline():
+    r = bench_bytes_read(2000)
+    if r['legacy']['bytes_read'] is None:
+        return  # no /proc/self/io here
+    assert r['legacy']['bytes_read'] > 3 * r['input_bytes'] > r['pipeline']['bytes_read']
@@ -0,0 +1,63 @@
+from src import change_cache
+from src.scheduler import _load_cache, _plan
+
+def _cfg(tmp_path):
+    return {'paths': {'manifest': str(tmp_path / 'metadata' / 'manifest.db')}, 'settings': {}}
+
+def _report():
+    return {'processed': [], 'skipped': [], 'failed': []}
+
+def test_identical_new_files_in_one_run_are_processed_once(tmp_path):
+    a, b = tmp_path / 'IRB_1.csv', tmp_path / 'IRB_2.csv'
+    a.write_text('protocol_id\nIRB1\n')
+    b.write_text('protocol_id\nIRB1\n')
+    cfg, report = _cfg(tmp_path), _report()
+    cache, by_hash = _load_cache(cfg)
+    todo, _ = _plan([('irb', str(a)), ('irb', str(b))], cfg, cache, by_hash, False, report)
+    assert todo == [('irb', str(a))]
+    assert [s['source'] for s in report['skipped']] == [str(b)]
+    assert str(b) not in cache.get('irb', {})  # retried next run if the first copy fails
+
+def test_one_file_for_two_modules_is_scheduled_for_both(tmp_path):
+    a = tmp_path / 'IRB_GRANTS_1.csv'
+    a.write_text('x\n1\n')
+    cfg = _cfg(tmp_path)
+    cache, by_hash = _load_cache(cfg)
+    todo, _ = _plan([('irb', str(a)), ('grants', str(a))], cfg, cache, by_hash, False, _report())
+    assert len(todo) == 2
+
+def test_load_drops_entries_for_deleted_files(tmp_path):
+    cfg, kept = _cfg(tmp_path), tmp_path / 'IRB_1.csv'
+    kept.write_text('x\n1\n')
+    fp = change_cache.fingerprint(str(kept))
+    cache = {'irb': {str(kept): dict(fp, module='irb'), str(tmp_path / 'gone.csv'): dict(fp, hash='0', module='irb')}}
+    change_cache.save_cache(cache, change_cache.cache_path(cfg))
+    cache, by_hash = _load_cache(cfg)
+    assert list(cache['irb']) == [str(kept)] and by_hash == {('irb', fp['hash']): str(kept)}
+
+def test_path_keyed_cache_is_read_per_module(tmp_path):
+    cfg, a = _cfg(tmp_path), tmp_path / 'IRB_1.csv'
+    a.write_text('x\n1\n')
+    change_cache.save_cache({str(a): dict(change_cache.fingerprint(str(a)), module='irb')}, change_cache.cache_path(cfg))
+    cache, _ = _load_cache(cfg)
+    assert list(cache) == ['irb'] and change_cache.is_unchanged(cache, 'irb', str(a))
+
+def test_module_that_failed_a_file_retries_it_after_another_module_succeeded(tmp_path):
+    a = tmp_path / 'IRB_GRANTS_1.csv'
+    a.write_text('x\n1\n')
+    cfg = _cfg(tmp_path)
+    cache, by_hash = _load_cache(cfg)
+    todo, fps = _plan([('irb', str(a)), ('grants', str(a))], cfg, cache, by_hash, False, _report())
+    change_cache.record(cache, 'irb', str(a), fps[str(a)])  # irb succeeded, grants failed
+    change_cache.save_cache(cache, change_cache.cache_path(cfg))
+    cache, by_hash = _load_cache(cfg)
+    report = _report()
+    todo, _ = _plan([('irb', str(a)), ('grants', str(a))], cfg, cache, by_hash, False, report)
+    assert todo == [('grants', str(a))]
+    assert [(s['module'], s['source']) for s in report['skipped']] == [('irb', str(a))]
+
+def test_save_is_debounced(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    assert change_cache.save_cache({}, path, change_cache.SAVE_INTERVAL_SEC)
+    assert not change_cache.save_cache({'x': {}}, path, change_cache.SAVE_INTERVAL_SEC)
+    assert change_cache.save_cache({'x': {}}, path)
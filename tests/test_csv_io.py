@@ -0,0 +1,46 @@
+from src import csv_io
+from src.benchmark import _in_child, FLAT_TOLERANCE
+
+def _csv(path, rows):
+    with open(path, 'wb') as f:
+        f.write(b'protocol_id,study_title,pi_name,status,last_updated\n')
+        f.write(b'IRB1,A study title,Dr. Smith,Active,2025-01-01\n' * rows)
+    return str(path)
+
+def _drain(path, chunk_rows):
+    csv_io.configure({'settings': {'csv_engine': 'pyarrow'}})
+    return sum(len(df) for df in csv_io.read_chunks(path, None, chunk_rows))
+
+def test_stream_block_size_follows_chunk_rows(tmp_path):
+    path = _csv(tmp_path / 'IRB_1.csv', 1000)
+    assert csv_io.stream_block_size(path, 50_000) == csv_io.MIN_BLOCK_SIZE
+    assert csv_io.stream_block_size(path, 50_000_000) == csv_io.BLOCK_SIZE
+
+def test_streaming_memory_stays_flat(tmp_path):
+    small, big = _csv(tmp_path / 'IRB_1.csv', 1_000_000), _csv(tmp_path / 'IRB_2.csv', 4_000_000)
+    (n_small, rss_small), (n_big, rss_big) = _in_child(_drain, small, 50_000), _in_child(_drain, big, 50_000)
+    assert (n_small, n_big) == (1_000_000, 4_000_000)
+    assert rss_big <= rss_small * FLAT_TOLERANCE, (rss_small, rss_big)
+
+MODULE_CFG = {'expected_columns': ['id', 'amount', 'count', 'status', 'opened', 'title'],
+              'columns': {'id': 'string', 'amount': 'float', 'count': 'int', 'status': 'category',
+                          'opened': 'date', 'title': 'string'}}
+
+def _staged(tmp_path, engine, chunk_rows):
+    from src.pipeline import process_file
+    root = tmp_path / f'{engine}_{chunk_rows}'
+    cfg = {'paths': {'staging': f'{root}/staging/', 'curated': f'{root}/curated/'},
+           'settings': {'stream_threshold_mb': 0 if chunk_rows else None, 'chunk_rows': chunk_rows}}
+    csv_io.configure({'settings': {'csv_engine': engine}})
+    return open(process_file('m', str(tmp_path / 'M_1.csv'), MODULE_CFG, cfg, record=False)['curated'], 'rb').read()
+
+def test_staged_bytes_do_not_depend_on_engine_or_streaming(tmp_path):
+    with open(tmp_path / 'M_1.csv', 'w') as f:
+        f.write('id,amount,count,status,opened,title\n')
+        for i in range(2500):
+            amount = '' if i % 7 == 0 else ('1000' if i % 3 else f'{i}.25')
+            count = '' if i % 11 == 0 else str(i)
+            f.write(f'A{i},{amount},{count},{"Active" if i % 2 else "Closed"},2025-01-{i % 28 + 1:02d},"t, {i}"\n')
+    outputs = {(e, c): _staged(tmp_path, e, c) for e in ('pyarrow', 'c') for c in (None, 1000)}
+    assert len(set(outputs.values())) == 1, {k: v[:200] for k, v in outputs.items()}
+    assert b'\n"A4",1000,4,' in outputs['c', 1000]
@@ -0,0 +1,30 @@
+import pandas as pd
+from src.curated_merge import merge_snapshot, snapshot_date, current_row
+
+MODULE_CFG = {'expected_columns': ['id', 'name', 'active'], 'primary_key': 'id',
+              'columns': {'id': 'string', 'name': 'string', 'active': 'bool'}}
+
+def _merge(db, source, rows):
+    df = pd.DataFrame(rows, columns=MODULE_CFG['expected_columns'])
+    return merge_snapshot(db, 'm', MODULE_CFG, [df], source)
+
+def test_snapshot_date_ignores_prefix_and_extension():
+    assert snapshot_date('IRB_PROTOCOL_2025-10-30.parquet') == '2025-10-30'
+    assert snapshot_date('/in/IRB_20261002.csv.gz') == '2026-10-02'
+    assert snapshot_date('IRB_big.csv') is None
+    assert snapshot_date('IRB_bad_20250399.csv') is None
+
+def test_merge_orders_by_snapshot_date(tmp_path):
+    db = str(tmp_path / 'w.db')
+    assert _merge(db, 'IRB_PROTOCOL_2025-10-30.parquet', [['1', 'a', 'true']])['inserted'] == 1
+    stats = _merge(db, 'IRB_2026-10-02.parquet', [['1', 'b', 'yes'], ['2', 'c', 'no']])
+    assert (stats['skipped'], stats['inserted'], stats['updated']) == (None, 1, 1)
+    stats = _merge(db, 'IRB_2026-01-01.csv', [['1', 'old', 'false']])
+    assert stats['skipped'] and stats['rows'] == 0
+    assert current_row(db, 'm', '1')['name'] == 'b'
+
+def test_same_snapshot_in_another_format_merges(tmp_path):
+    db = str(tmp_path / 'w.db')
+    _merge(db, 'IRB_big.parquet', [['1', 'a', '1']])
+    stats = _merge(db, 'IRB_big.csv', [['1', 'a', '1']])
+    assert (stats['skipped'], stats['unchanged']) == (None, 1)
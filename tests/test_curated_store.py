@@ -0,0 +1,16 @@
+import pandas as pd
+from src.curated_store import coerce_types, to_arrow
+
+MODULE_CFG = {'expected_columns': ['id', 'flag'], 'columns': {'id': 'int', 'flag': 'bool'}}
+
+def test_bool_columns_accept_common_spellings():
+    df = pd.DataFrame({'id': ['1', '2', '3', '4', '5', '6'],
+                       'flag': ['true', ' Yes', 'NO ', '0', 'maybe', None]})
+    flags = coerce_types(df, MODULE_CFG)['flag']
+    assert str(flags.dtype) == 'boolean'
+    assert flags.tolist()[:4] == [True, True, False, False]
+    assert flags.isna().tolist()[4:] == [True, True]
+
+def test_bool_columns_write_as_arrow_bool():
+    df = pd.DataFrame({'id': ['1', '2'], 'flag': ['1', 'false']})
+    assert to_arrow(df, MODULE_CFG).column('flag').to_pylist() == [True, False]
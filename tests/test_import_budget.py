@@ -0,0 +1,9 @@
+import os, pytest
+from src.import_budget import CHECKS, run_check
+
+SCALE = float(os.environ.get('IMPORT_BUDGET_SCALE', '1'))  # loosen on slow CI machines
+
+@pytest.mark.parametrize('check', CHECKS, ids=[c['name'] for c in CHECKS])
+def test_import_budget(check):
+    result = run_check(check, SCALE)
+    assert result['ok'], f"{result['problems']}; slowest: {result['slowest']}"
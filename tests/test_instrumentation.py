@@ -0,0 +1,24 @@
+import numpy as np
+from src import instrumentation
+from src.instrumentation import timed
+
+def test_peak_is_per_stage_not_lifetime(monkeypatch):
+    ctx = {}
+    with timed(ctx, 'big'):
+        block = np.ones(200 * 1024 * 1024 // 8)
+        del block
+    with timed(ctx, 'small'):
+        np.ones(1024).sum()
+    big, small = (t['peak_rss_mb'] for t in ctx['timings'])
+    assert big - small > 150, (big, small)
+
+def test_tracemalloc_fallback_without_clear_refs(monkeypatch):
+    monkeypatch.setattr(instrumentation, 'reset_peak_rss', lambda: False)
+    ctx = {}
+    with timed(ctx, 'big'):
+        block = bytearray(64 * 1024 * 1024)
+        del block
+    with timed(ctx, 'small'):
+        bytearray(1024)
+    big, small = (t['peak_rss_mb'] for t in ctx['timings'])
+    assert big >= 64 and small < 1, (big, small)
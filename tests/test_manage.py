@@ -0,0 +1,15 @@
+import sqlite3
+from click.testing import CliRunner
+import manage
+from src.metrics import migrate
+
+def test_stats_prints_na_without_runs(tmp_path, monkeypatch):
+    db = str(tmp_path / 'etl_stats.db')
+    conn = sqlite3.connect(db)
+    migrate(conn)
+    conn.close()
+    monkeypatch.setattr(manage, 'load_settings', lambda: {'paths': {'stats_db': db}})
+    result = CliRunner().invoke(manage.cli, ['stats', '--since', '7d'])
+    assert result.exit_code == 0, result.output
+    assert 'None' not in result.output
+    assert 'avg n/a, p50 n/a, p95 n/a, max n/a' in result.output
@@ -0,0 +1,23 @@
+import sqlite3, json
+from src.metadata_utils import migrate_json_manifest, MANIFEST_SCHEMA
+
+def _db():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(MANIFEST_SCHEMA)
+    return conn
+
+def _version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def test_migration_is_marked_done_only_after_a_successful_import(tmp_path):
+    conn, path = _db(), tmp_path / 'manifest.json'
+    assert (migrate_json_manifest(conn, str(path)), _version(conn)) == (0, 0)  # missing
+    path.write_text('[{"filename": "a.csv"')
+    assert (migrate_json_manifest(conn, str(path)), _version(conn)) == (0, 0)  # invalid JSON
+    path.write_text(json.dumps([{'filename': 'a.csv', 'hash': 'h1', 'timestamp': 't1'}, {'filename': 'b.csv'}]))
+    assert (migrate_json_manifest(conn, str(path)), _version(conn)) == (0, 0)  # bad entry, nothing half-imported
+    assert conn.execute('SELECT count(*) FROM manifest').fetchone()[0] == 0
+    path.write_text(json.dumps([{'filename': 'a.csv', 'hash': 'h1', 'timestamp': 't1'}]))
+    assert (migrate_json_manifest(conn, str(path)), _version(conn)) == (1, 1)
+    assert migrate_json_manifest(conn, str(path)) == 0  # once only
+    assert conn.execute('SELECT count(*) FROM manifest').fetchone()[0] == 1
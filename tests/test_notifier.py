@@ -0,0 +1,143 @@
+import socketserver, threading, time, json, contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.notifier import Dispatcher
+
+SETTINGS = {'digest_window_sec': 0.2, 'backoff_sec': 0, 'retries': 2, 'timeout_sec': 1}
+
+def test_messages_in_one_window_go_out_as_a_digest():
+    sent = []
+    d = Dispatcher({'notifications': SETTINGS}, {'local': lambda *m: sent.append(m)})
+    d.notify('irb', 'ok', 'SUCCESS')
+    d.notify('grants', 'boom', 'FAILURE')
+    assert d.close(5)
+    assert len(sent) == 1 and sent[0][2] == 'FAILURE' and '2 notifications' in sent[0][0]
+
+def test_failing_channel_is_retried_without_blocking_others():
+    calls, sent = [], []
+    def flaky(*m):
+        calls.append(m)
+        if len(calls) < 2:
+            raise OSError('connection refused')
+    d = Dispatcher({'notifications': SETTINGS}, {'flaky': flaky, 'local': lambda *m: sent.append(m)})
+    d.notify('irb', 'ok')
+    assert d.close(5)
+    assert (len(calls), len(sent), d.sent, d.failed) == (2, 1, 2, 0)
+
+# -------- SMTP stand-in --------
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough SMTP for smtplib; drops each connection after `drop_after` messages."""
+    daemon_threads = allow_reuse_address = True
+
+    def __init__(self, drop_after=None):
+        self.messages, self.connections, self.drop_after = [], 0, drop_after
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        sent = 0
+        self.reply('220 stand-in ESMTP')
+        while line := self.rfile.readline():
+            verb = line.decode().strip().split(' ')[0].upper()
+            if verb == 'EHLO':
+                self.reply('250 stand-in')
+            elif verb == 'DATA':
+                self.reply('354 go ahead')
+                data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                self.server.messages.append(data.decode())
+                self.reply('250 queued')
+                sent += 1
+                if sent == self.server.drop_after:
+                    return  # connection dropped without QUIT
+            elif verb == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+@contextlib.contextmanager
+def serving(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def _email_cfg(server):
+    return {'email': {'sender': 'etl@example.org', 'recipients': ['ops@example.org'],
+                      'smtp_host': '127.0.0.1', 'smtp_port': server.server_address[1]},
+            'notifications': SETTINGS}
+
+def test_email_reconnects_after_the_server_drops_the_connection():
+    with serving(SMTPStandIn(drop_after=1)) as server:
+        d = Dispatcher(_email_cfg(server) | {'notifications': SETTINGS | {'retries': 0}})  # reconnect, not retry
+        d.notify('first', 'body 1')
+        time.sleep(0.5)  # first digest window closes and is sent
+        d.notify('second', 'body 2')
+        assert d.close(5)
+    assert (d.sent, d.failed) == (2, 0)
+    assert server.connections == 2
+    assert ['Subject: first' in m for m in server.messages] == [True, False]
+    assert 'Subject: second' in server.messages[1]
+
+def test_pending_digest_is_flushed_on_shutdown():
+    with serving(SMTPStandIn()) as server:
+        d = Dispatcher(_email_cfg(server) | {'notifications': SETTINGS | {'digest_window_sec': 30}})
+        for i in range(3):
+            d.notify(f'file {i}', 'done')
+        assert d.close(5)
+    assert len(server.messages) == 1 and 'ETL digest: 3 notifications' in server.messages[0]
+
+# -------- webhook stand-in --------
+class WebhookStandIn(ThreadingHTTPServer):
+    """Answers each POST with the next scripted status; 'slow' stalls past the client timeout."""
+    daemon_threads = True
+
+    def __init__(self, script):
+        self.script, self.requests, self.clients = list(script), [], set()
+        super().__init__(('127.0.0.1', 0), WebhookHandler)
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so session reuse is visible
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(json.loads(body))
+        self.server.clients.add(self.client_address)
+        step = self.server.script.pop(0) if self.server.script else 200
+        if step == 'slow':
+            time.sleep(1.5)
+            step = 200
+        self.send_response(step)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+def _slack_cfg(server, **settings):
+    return {'alerts': {'slack_webhook': f'http://127.0.0.1:{server.server_address[1]}/hook'},
+            'notifications': SETTINGS | settings}
+
+def test_slack_retries_5xx_and_429_over_one_connection():
+    with serving(WebhookStandIn([503, 429, 200, 200])) as server:
+        d = Dispatcher(_slack_cfg(server))
+        d.notify('irb', 'ok', 'SUCCESS')
+        time.sleep(0.5)
+        d.notify('grants', 'ok', 'SUCCESS')
+        assert d.close(5)
+    assert (d.sent, d.failed, len(server.requests)) == (2, 0, 4)
+    assert len(server.clients) == 1  # every post reused the pooled keep-alive connection
+    assert server.requests[0]['attachments'][0]['title'] == 'irb'
+
+def test_slack_gives_up_after_retries_and_times_out_slow_posts():
+    with serving(WebhookStandIn(['slow', 500, 500, 500])) as server:
+        d = Dispatcher(_slack_cfg(server, timeout_sec=0.3, retries=3))
+        d.notify('irb', 'failed', 'FAILURE')
+        assert d.close(10)
+    assert (d.sent, d.failed, len(server.requests)) == (0, 1, 4)
@@ -0,0 +1,68 @@
+import os, time, datetime
+from src.retention_cleanup import purge_old_files, purge_archive
+
+DAY = 86400
+
+def _file(path, age_days=0, data=b'x'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    t = time.time() - age_days * DAY
+    os.utime(path, (t, t))
+    return path
+
+def _tree(root):
+    return sorted((os.path.relpath(os.path.join(d, n), root), os.lstat(os.path.join(d, n)).st_mtime_ns)
+                  for d, dirs, files in os.walk(root) for n in dirs + files)
+
+def _zone(tmp_path):
+    raw = tmp_path / 'raw'
+    _file(raw / 'old' / 'a.csv', 10, b'aaaa')
+    _file(raw / 'old' / 'sub' / 'b.csv', 10, b'bb')
+    _file(raw / 'mixed' / 'c.csv', 10)
+    _file(raw / 'mixed' / 'd.csv', 1)
+    _file(raw / 'fresh' / 'e.csv', 4.9)
+    return raw
+
+def test_purge_removes_files_past_the_cutoff_and_the_directories_they_empty(tmp_path):
+    raw = _zone(tmp_path)
+    stats = purge_old_files(str(raw), 5)
+    assert (stats['files'], stats['bytes'], stats['dirs'], stats['errors']) == (3, 7, 2, 0)
+    assert sorted(p for p, _ in _tree(raw)) == ['fresh', 'fresh/e.csv', 'mixed', 'mixed/d.csv']
+    assert raw.is_dir()  # the zone root stays even when it empties
+
+def test_dry_run_reports_the_same_purge_and_touches_nothing(tmp_path):
+    raw = _zone(tmp_path)
+    before = _tree(raw)
+    stats = purge_old_files(str(raw), 5, dry_run=True)
+    assert (stats['dry_run'], stats['files'], stats['bytes'], stats['dirs']) == (True, 3, 7, 2)
+    assert _tree(raw) == before
+
+def _archive(tmp_path):
+    """An expired and a current snapshot sharing one object, plus objects only the expired one or nothing links."""
+    archive = tmp_path / 'archive'
+    old = (datetime.date.today() - datetime.timedelta(days=60)).isoformat()
+    today = datetime.date.today().isoformat()
+    shared = _file(archive / 'objects' / 'aa' / 'aa11', data=b'shared')
+    expiring = _file(archive / 'objects' / 'bb' / 'bb22', data=b'old only')
+    _file(archive / 'objects' / 'cc' / 'cc33', data=b'orphan')
+    for snapshot, obj in ((old, shared), (old, expiring), (today, shared)):
+        dst = archive / snapshot / 'module=irb' / obj.name
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        os.link(obj, dst)
+    return archive, old, today
+
+def test_archive_purge_keeps_objects_a_live_snapshot_still_links(tmp_path):
+    archive, old, today = _archive(tmp_path)
+    stats = purge_archive(str(archive), 30)
+    assert stats['errors'] == 0
+    assert not (archive / old).exists() and (archive / today / 'module=irb' / 'aa11').read_bytes() == b'shared'
+    assert sorted(os.listdir(archive / 'objects' / 'aa')) == ['aa11']
+    assert os.listdir(archive / 'objects' / 'bb') == os.listdir(archive / 'objects' / 'cc') == []
+
+def test_archive_dry_run_counts_what_would_go_and_touches_nothing(tmp_path):
+    archive, old, today = _archive(tmp_path)
+    before = _tree(archive)
+    stats = purge_archive(str(archive), 30, dry_run=True)
+    objects = [p for p in stats['sample'] if os.sep + 'objects' + os.sep in p]
+    assert sorted(os.path.basename(p) for p in objects) == ['bb22', 'cc33']
+    assert _tree(archive) == before
@@ -0,0 +1,13 @@
+import os, stat, datetime
+from src.retention_cleanup import archive_curated_data
+
+def test_archive_leaves_curated_files_writable(tmp_path):
+    curated = tmp_path / 'curated' / 'module=irb' / 'load_date=2026-10-01'
+    curated.mkdir(parents=True)
+    src = curated / 'IRB_20261001.parquet'
+    src.write_bytes(b'curated bytes')
+    stats = archive_curated_data(str(tmp_path / 'curated'), str(tmp_path / 'archive'))
+    assert (stats['files'], stats['new_objects']) == (1, 1)
+    assert os.stat(src).st_mode & stat.S_IWUSR
+    archived = tmp_path / 'archive' / datetime.date.today().isoformat()
+    assert (archived / 'module=irb' / 'load_date=2026-10-01' / 'IRB_20261001.parquet').read_bytes() == b'curated bytes'
@@ -0,0 +1,53 @@
+import os, io, types, threading
+from src.sftp_ingest import fetch, fetch_one, ConnectionPool
+
+def _cfg(tmp_path):
+    remote = tmp_path / 'remote'
+    remote.mkdir()
+    (remote / 'IRB_20250101.csv').write_text('protocol_id,study_title\nIRB1,a\n')
+    (remote / 'notes.txt').write_text('not a feed file')
+    return {'paths': {'manifest': str(tmp_path / 'metadata' / 'manifest.db')},
+            'sftp': {'host': f'file://{remote}', 'remote_dir': '/', 'local_dir': str(tmp_path / 'incoming')}}
+
+def test_fetch_from_local_stand_in(tmp_path):
+    cfg, stats = _cfg(tmp_path), {}
+    assert [os.path.basename(p) for p in fetch(cfg, stats)] == ['IRB_20250101.csv']
+    assert (stats['listed'], stats['fetched']) == (1, 1)
+    assert list(fetch(cfg, stats)) == [] and stats['skipped'] == 1
+
+def test_force_fetches_known_files_again(tmp_path):
+    cfg, stats = _cfg(tmp_path), {}
+    list(fetch(cfg))
+    assert [os.path.basename(p) for p in fetch(cfg, stats, force=True)] == ['IRB_20250101.csv']
+    assert (stats['fetched'], stats['unchanged']) == (1, 0)
+
+class RecordingFile(io.BytesIO):
+    """Remote file stand-in that records paramiko-style prefetch requests as (start, end) ranges."""
+    def __init__(self, data, ranges):
+        super().__init__(data)
+        self.ranges = ranges
+
+    def prefetch(self, file_size=None):
+        self.ranges.append((self.tell(), file_size))
+
+class RecordingClient:
+    def __init__(self, data):
+        self.data, self.ranges = data, []
+
+    def open(self, path, mode='rb'):
+        return RecordingFile(self.data, self.ranges)
+
+    def close(self):
+        pass
+
+def test_resume_prefetches_the_whole_remainder(tmp_path):
+    data = b'protocol_id\n' + b'IRB1\n' * 1000
+    client = RecordingClient(data)
+    pool = ConnectionPool(lambda: client, 1)
+    offset = len(data) * 3 // 4  # past the halfway point
+    (tmp_path / '.IRB_1.csv.part').write_bytes(data[:offset])
+    attr = types.SimpleNamespace(filename='IRB_1.csv', st_size=len(data), st_mtime=1_700_000_000)
+    state = {'partial': {'IRB_1.csv': {'size': len(data), 'mtime': 1_700_000_000}}}
+    final, _ = fetch_one(pool, attr, '/', str(tmp_path), state, threading.Lock(), lambda: None)
+    assert client.ranges == [(offset, len(data))]
+    assert open(final, 'rb').read() == data
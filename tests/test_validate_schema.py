@@ -0,0 +1,42 @@
+import pandas as pd, pytest
+import src.curated_store, src.data_quality
+from src.validate_schema import Schema, validate_schema
+from src.curated_store import coerce_types
+from src.data_quality import partial_profile, summarize, check_thresholds
+
+MODULE_CFG = {'expected_columns': ['id', 'opened'], 'columns': {'id': 'int', 'opened': 'date'},
+              'quality': {'max_nonconforming_rate': 0.1}}
+
+def _frame(opened):
+    return pd.DataFrame({'id': pd.array(range(len(opened)), dtype='Int64'), 'opened': opened})
+
+def test_nonconforming_rate_is_over_non_null_values():
+    # 1 bad date in 5 non-null values is 20%, although it is only 1 in 20 rows
+    df = _frame(['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', 'soon'] + [None] * 15)
+    with pytest.raises(ValueError, match=r'opened \(1 of 5 non-null\)'):
+        Schema(MODULE_CFG).validate(df, 'irb.csv')
+
+def test_profile_reports_but_does_not_enforce_the_rate():
+    df = _frame(['2024-01-01', 'soon'])
+    summary = summarize(partial_profile(df, MODULE_CFG))
+    assert summary['columns']['opened']['nonconforming_rate'] == 0.5
+    check_thresholds(summary, MODULE_CFG, 'irb.csv')  # Schema.finish is the one place the rate fails a file
+
+def test_values_parsed_by_the_check_are_reused(monkeypatch):
+    df = _frame(['2024-01-01', None, '2024-03-01'] + ['2024-04-01'] * 20)
+    parsed = {}
+    Schema(MODULE_CFG).validate(df, 'irb.csv', parsed)
+    assert sorted(parsed) == ['id', 'opened'] and len(parsed['opened']) == 22
+    def parse_again(values, kind):
+        raise AssertionError(f'parsed again as {kind}')
+    monkeypatch.setattr(src.curated_store, 'parse_values', parse_again)
+    monkeypatch.setattr(src.data_quality, 'parse_values', parse_again)
+    typed = coerce_types(df, MODULE_CFG, parsed)
+    assert str(typed['opened'].dtype).startswith('datetime64') and typed['opened'].isna().tolist()[:3] == [False, True, False]
+    assert partial_profile(df, MODULE_CFG, parsed)['columns']['opened']['max'] == '2024-04-01T00:00:00'
+
+def test_validate_schema_returns_the_data(tmp_path):
+    path = tmp_path / 'irb.csv'
+    path.write_text('id,opened\n1,2024-01-01\n2,\n')
+    df = validate_schema(str(path), MODULE_CFG)
+    assert df['id'].tolist() == [1, 2] and df['opened'].isna().tolist() == [False, True]